@@ -0,0 +1,142 @@
+"""
+This module contains the asyncio load engine used by load-hhs.py and
+load-quality.py when they are run with --async.
+
+The batches of a file are produced on a worker thread, so reading and
+cleaning the CSV file does not block the event loop, and are written by
+several asynchronous connections at once. Each batch goes to exactly one
+connection and is committed in its own transaction, as in the synchronous
+loaders, so a failed batch never rolls back the batches of other
+connections.
+"""
+
+import asyncio
+import contextlib
+import logging
+import psycopg
+from psycopg.pq import TransactionStatus
+import credentials
+import loader_utils
+
+# sent to each writer once every batch has been queued
+_END_OF_BATCHES = object()
+
+
+async def connect(**kwargs):
+    """
+    Open an asynchronous connection to the hospital database.
+
+    Parameters:
+    - kwargs: Extra arguments for psycopg.AsyncConnection.connect, such as
+        autocommit.
+
+    Returns:
+    - psycopg.AsyncConnection: The new connection.
+    """
+    return await psycopg.AsyncConnection.connect(
+        host=loader_utils.DB_HOST,
+        dbname=credentials.DB_USER,
+        user=credentials.DB_USER,
+        password=credentials.DB_PASSWORD,
+        **kwargs
+    )
+
+
+@contextlib.asynccontextmanager
+async def batch_transaction(conn, pipelined=True):
+    """
+    Asynchronous loader_utils.batch_transaction(): run the statements of a
+    batch in one transaction, sent in a single pipeline with one sync when
+    pipeline mode is enabled and supported, else in conn.transaction().
+    """
+    if not (pipelined and conn.autocommit and loader_utils.USE_PIPELINE
+            and psycopg.AsyncPipeline.is_supported()):
+        async with conn.transaction():
+            yield
+        return
+
+    try:
+        async with conn.pipeline():
+            await conn.execute("BEGIN")
+            yield
+            await conn.execute("COMMIT")
+    except BaseException:
+        # the pipeline has synced, so a failed transaction is still open
+        if conn.info.transaction_status != TransactionStatus.IDLE:
+            try:
+                await conn.execute("ROLLBACK")
+            except psycopg.Error as e:
+                logging.warning(f"Rolling back the failed batch failed: {e}")
+        raise
+
+
+async def run_batches(batches, write_batch, concurrency=4, connect=connect,
+                      setup=None):
+    """
+    Write batches on several asynchronous connections at once.
+
+    Parameters:
+    - batches (iterable): Batches to write, usually a generator that reads
+        and cleans the file lazily. It is consumed on a worker thread.
+    - write_batch (coroutine function): Called with a connection and a
+        batch; responsible for the batch's transaction.
+    - concurrency (int): Number of connections writing batches.
+    - connect (coroutine function): Opens one connection, called with
+        autocommit=True.
+    - setup (coroutine function): Called with each connection once it is
+        open, e.g. to create temporary tables.
+
+    Notes:
+    - If a batch or the batch stream raises, the other writers are
+      cancelled, which rolls back the batches they were writing, and the
+      exception is re-raised.
+    """
+    pending = asyncio.Queue(maxsize=concurrency * 2)
+    conns = await asyncio.gather(
+        *(connect(autocommit=True) for _ in range(concurrency)),
+        return_exceptions=True)
+    failures = [c for c in conns if isinstance(c, BaseException)]
+    if failures:
+        for conn in conns:
+            if not isinstance(conn, BaseException):
+                await conn.close()
+        raise failures[0]
+
+    async def produce():
+        iterator = iter(batches)
+        while True:
+            batch = await asyncio.to_thread(next, iterator, _END_OF_BATCHES)
+            if batch is _END_OF_BATCHES:
+                break
+            await pending.put(batch)
+        for _ in conns:
+            await pending.put(_END_OF_BATCHES)
+
+    async def write(conn):
+        if setup:
+            await setup(conn)
+        while True:
+            batch = await pending.get()
+            if batch is _END_OF_BATCHES:
+                return
+            await write_batch(conn, batch)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(write(conn)) for conn in conns]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException as e:
+        logging.error(f"Asynchronous load failed: {e}")
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        for conn in conns:
+            await conn.close()
+
+
+def run(batches, write_batch, concurrency=4, connect=connect, setup=None):
+    """Run run_batches() in a new event loop, see run_batches()."""
+    asyncio.run(run_batches(batches, write_batch, concurrency, connect,
+                            setup))
@@ -0,0 +1,153 @@
+"""
+Backfill many weekly HHS and CMS files in parallel.
+
+Files whose name contains 'Hospital_General_Information' are loaded with
+load-quality.py, using the date in the file name (for example
+Hospital_General_Information-2021-07 is loaded as 2021-07-01) as
+last_updated. All other files are loaded with load-hhs.py.
+"""
+
+import argparse
+import glob
+import importlib
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+import loader_utils
+
+CMS_FILE_MARKER = "Hospital_General_Information"
+
+# logging configuration, set before the loaders configure their own log files
+logging.basicConfig(
+    filename='backfill.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(process)d - %(levelname)s - %(message)s'
+)
+
+
+def infer_last_updated(file_path):
+    """
+    Infer the last_updated date of a CMS file from its name.
+
+    Parameters:
+    - file_path (str): Path such as 'Hospital_General_Information-2021-07.csv'
+        or 'Hospital_General_Information-2021-07-15.csv'.
+
+    Returns:
+    - datetime.date: The date in the file name, using the first day of the
+        month when no day is given.
+    """
+    match = re.search(r'(\d{4})-(\d{2})(?:-(\d{2}))?',
+                      os.path.basename(file_path))
+    if match is None:
+        raise ValueError(f"Cannot infer last_updated from {file_path}")
+    year, month, day = match.groups()
+    return date(int(year), int(month), int(day or 1))
+
+
+def find_files(paths):
+    """Expand directories and glob patterns into a sorted list of files."""
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            path = os.path.join(path, "*")
+        files.update(f for f in glob.glob(path) if os.path.isfile(f))
+    return sorted(files)
+
+
+def load_one_file(file_path, mode, chunksize, force=False):
+    """
+    Load a single HHS or CMS file on its own database connection.
+
+    Returns:
+    - dict: Summary of the load with the file, kind, rows, seconds and error.
+    """
+    is_cms = CMS_FILE_MARKER in os.path.basename(file_path)
+    summary = {'file': file_path, 'kind': 'CMS' if is_cms else 'HHS',
+               'rows': 0, 'seconds': 0.0, 'error': None}
+    start_time = time.perf_counter()
+    try:
+        if is_cms:
+            loader = importlib.import_module("load-quality")
+            last_updated = infer_last_updated(file_path)
+            with loader_utils.connect(autocommit=True) as conn:
+                summary['rows'] = loader.load_file(
+                    conn, file_path, last_updated, chunksize, force=force)
+        else:
+            loader = importlib.import_module("load-hhs")
+            with loader_utils.connect(autocommit=True) as conn:
+                summary['rows'] = loader.load_file(
+                    conn, file_path, mode, chunksize, force=force)
+    except Exception as e:
+        logging.error(f"Loading {file_path} failed: {e}")
+        summary['error'] = str(e)
+    summary['seconds'] = time.perf_counter() - start_time
+    return summary
+
+
+def print_summary(summaries):
+    """Print the rows/sec achieved for every file."""
+    print(f"{'file':60} {'kind':4} {'rows':>9} {'seconds':>8} "
+          f"{'rows/sec':>9}  status")
+    for s in sorted(summaries, key=lambda s: s['file']):
+        rows_per_sec = s['rows'] / s['seconds'] if s['seconds'] > 0 else 0.0
+        status = 'ok' if s['error'] is None else f"failed: {s['error']}"
+        print(f"{os.path.basename(s['file']):60} {s['kind']:4} "
+              f"{s['rows']:>9} {s['seconds']:>8.2f} {rows_per_sec:>9.0f}  "
+              f"{status}")
+
+
+def parse_args(argv):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Load weekly HHS and CMS files in parallel.")
+    parser.add_argument("paths", nargs="+",
+                        help="directories or glob patterns of files to load")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--mode", choices=["executemany", "copy"],
+                        default="copy",
+                        help="how HHS rows are sent to HospitalLogistics")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="stream each file this many rows at a time")
+    parser.add_argument("--force", action="store_true",
+                        help="reload files that were already loaded")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    files = find_files(args.paths)
+    if not files:
+        print("No files matched.")
+        sys.exit(1)
+
+    logging.info(f"Backfilling {len(files)} files with "
+                 f"{args.workers} workers")
+    summaries = []
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(load_one_file, f, args.mode, args.chunksize,
+                            args.force)
+            for f in files
+        ]
+        for future in as_completed(futures):
+            summaries.append(future.result())
+
+    print_summary(summaries)
+    elapsed = time.perf_counter() - start_time
+    total_rows = sum(s['rows'] for s in summaries)
+    failed = sum(s['error'] is not None for s in summaries)
+    print(f"Loaded {total_rows} rows from {len(files)} files in "
+          f"{elapsed:.2f}s ({failed} failed)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
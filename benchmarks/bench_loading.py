@@ -0,0 +1,198 @@
+"""
+Benchmark the HHS and CMS loading pipeline.
+
+For every requested size, synthetic HHS and CMS files are generated with
+synthetic_data.py and each stage of the loaders is timed separately:
+read_csv, process_hhs_data / process_cms_data and building the row
+tuples sent to the database with loader_utils.row_tuples. With
+--dsn, both files are also loaded end to end into a throwaway Postgres
+database, whose tables are dropped and recreated first.
+
+Results are written as JSON so that runs on different commits can be
+compared.
+
+This can be run like this:
+    python benchmarks/bench_loading.py --rows 10000 100000 1000000
+    python benchmarks/bench_loading.py --rows 100000 --output base.json \\
+        --dsn postgresql://localhost/hospital_bench --mode copy
+"""
+
+import argparse
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import pandas as pd  # noqa: E402
+import psycopg  # noqa: E402
+import helper_functions  # noqa: E402
+import loader_utils  # noqa: E402
+import synthetic_data  # noqa: E402
+
+load_hhs = importlib.import_module("load-hhs")
+load_quality = importlib.import_module("load-quality")
+create_tables = importlib.import_module("create-tables")
+
+# CMS files have one row per hospital, so they are capped at this size
+MAX_CMS_ROWS = 10_000
+LAST_UPDATED = datetime.date(2021, 7, 1)
+
+
+def timed(results, rows, stage, func, repeat=1):
+    """
+    Run func repeat times, record its best time in results and return its
+    last result. Output printed by the loaders is discarded.
+    """
+    best = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start_time = time.perf_counter()
+            result = func()
+            seconds = time.perf_counter() - start_time
+        best = seconds if best is None else min(best, seconds)
+    results.append({
+        'stage': stage,
+        'rows': rows,
+        'seconds': round(best, 4),
+        'rows_per_sec': round(rows / best) if best > 0 else None,
+    })
+    print(f"{stage:28} {rows:>9} rows {best:>9.3f}s")
+    return result
+
+
+def bench_stages(results, hhs_file, cms_file, rows, cms_rows, repeat):
+    """Time each cleaning stage of both loaders on the generated files."""
+    raw = timed(results, rows, 'hhs_read_csv',
+                lambda: pd.read_csv(hhs_file, dtype=load_hhs.CSV_DTYPES),
+                repeat)
+    processed = timed(results, rows, 'hhs_process_hhs_data',
+                      lambda: helper_functions.process_hhs_data(raw.copy()),
+                      repeat)
+    timed(results, rows, 'hhs_row_tuples',
+          lambda: loader_utils.row_tuples(
+              processed, load_hhs.HOSPITAL_LOGISTICS_COLUMNS),
+          repeat)
+
+    def read_cms():
+        data = pd.read_csv(cms_file, dtype=load_quality.CSV_DTYPES)
+        data['last_updated'] = LAST_UPDATED
+        return data
+
+    raw = timed(results, cms_rows, 'cms_read_csv', read_cms, repeat)
+    processed = timed(results, cms_rows, 'cms_process_cms_data',
+                      lambda: helper_functions.process_cms_data(raw.copy()),
+                      repeat)
+    timed(results, cms_rows, 'cms_row_tuples',
+          lambda: loader_utils.row_tuples(processed,
+                                          load_quality.LOADED_COLUMNS),
+          repeat)
+
+
+def reset_database(dsn):
+    """Drop and recreate every table of the schema."""
+    tables = [name for name, _ in create_tables.TABLE_CREATE_QUERIES]
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(f"DROP TABLE IF EXISTS "
+                     f"{', '.join(reversed(tables))} CASCADE")
+        for _, create_query in create_tables.TABLE_CREATE_QUERIES:
+            conn.execute(create_query)
+
+
+def bench_end_to_end(results, dsn, hhs_file, cms_file, rows, cms_rows, mode,
+                     chunksize):
+    """Load both files into an empty database and time each load."""
+    reset_database(dsn)
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        timed(results, rows, f'e2e_hhs_load_{mode}',
+              lambda: load_hhs.load_file(conn, hhs_file, mode, chunksize,
+                                         force=True, cache=False))
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        timed(results, cms_rows, 'e2e_cms_load',
+              lambda: load_quality.load_file(conn, cms_file, LAST_UPDATED,
+                                             chunksize, force=True,
+                                             cache=False))
+
+
+def git_commit():
+    """Return the current commit of the repository, if there is one."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, check=True,
+            capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the HHS and CMS loading pipeline.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000],
+                        help="HHS file sizes to benchmark (10k to 5M)")
+    parser.add_argument("--hospitals", type=int, default=5000,
+                        help="distinct hospitals in the generated files")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per stage; the best time is kept")
+    parser.add_argument("--dsn", default=None,
+                        help="throwaway Postgres database for end-to-end "
+                             "loads; its tables are dropped")
+    parser.add_argument("--mode", choices=sorted(load_hhs.INSERT_MODES),
+                        default="copy",
+                        help="how HHS rows are sent in end-to-end loads")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="chunk size for end-to-end loads")
+    parser.add_argument("--data-dir", default=None,
+                        help="keep the generated files in this directory")
+    parser.add_argument("--output", default="bench_loading.json",
+                        help="JSON file to write the results to")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    results = []
+    with contextlib.ExitStack() as stack:
+        data_dir = args.data_dir or stack.enter_context(
+            tempfile.TemporaryDirectory())
+        os.makedirs(data_dir, exist_ok=True)
+        for rows in args.rows:
+            cms_rows = min(args.hospitals, rows, MAX_CMS_ROWS)
+            hhs_file = os.path.join(data_dir, f"hhs-{rows}.csv")
+            cms_file = os.path.join(data_dir, f"cms-{cms_rows}.csv")
+            if not os.path.exists(hhs_file):
+                synthetic_data.write_hhs_csv(hhs_file, rows, args.hospitals)
+            if not os.path.exists(cms_file):
+                synthetic_data.write_cms_csv(cms_file, cms_rows)
+
+            bench_stages(results, hhs_file, cms_file, rows, cms_rows,
+                         args.repeat)
+            if args.dsn:
+                bench_end_to_end(results, args.dsn, hhs_file, cms_file, rows,
+                                 cms_rows, args.mode, args.chunksize)
+
+    report = {
+        'benchmark': 'loading',
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'hospitals': args.hospitals,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
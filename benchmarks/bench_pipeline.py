@@ -0,0 +1,329 @@
+"""
+Benchmark end-to-end load throughput with and without pipeline mode, over
+a link with added latency.
+
+Synthetic HHS and CMS files are loaded into a throwaway Postgres database
+with each variant of the loaders:
+- sync: one connection, batch transactions run in conn.transaction()
+  (loader_utils.USE_PIPELINE is turned off), so BEGIN, every statement
+  and COMMIT each wait for the server. psycopg still pipelines the rows of
+  a single executemany() call when libpq allows it.
+- sync_pipeline: one connection, each batch transaction is sent in one
+  pipeline that syncs once, as the loaders do by default.
+- async: --concurrency asynchronous connections, with pipeline mode.
+
+The loaders connect through a local TCP proxy that delays every packet by
+half of --latency-ms in each direction, which simulates a remote database
+such as our Azure Postgres from a local one. The proxy also counts the
+ReadyForQuery messages the server sends, one per Sync or simple query,
+which is the number of round trips the loaders waited for (summed over
+the connections of the async variant). It only understands unencrypted
+connections, so SSL and GSS encryption are disabled. All tables in the
+database are dropped before every load.
+
+This can be run like this:
+    python benchmarks/bench_pipeline.py --dsn postgresql://localhost/bench \\
+        --rows 20000 --latency-ms 0 20 50
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import pandas as pd  # noqa: E402
+import psycopg  # noqa: E402
+from psycopg.conninfo import conninfo_to_dict, make_conninfo  # noqa: E402
+import loader_utils  # noqa: E402
+import synthetic_data  # noqa: E402
+from bench_loading import (  # noqa: E402
+    LAST_UPDATED, MAX_CMS_ROWS, git_commit, reset_database)
+
+load_hhs = importlib.import_module("load-hhs")
+load_quality = importlib.import_module("load-quality")
+
+# variant name -> (use pipeline mode, use asynchronous connections)
+VARIANTS = {
+    'sync': (False, False),
+    'sync_pipeline': (True, False),
+    'async': (True, True),
+}
+
+
+class ServerMessages:
+    """
+    Split the messages a Postgres server sends on one connection and count
+    its ReadyForQuery messages in proxy.ready_for_query. Without SSL or GSS
+    encryption, each message is a type byte and an int32 length that
+    includes itself, from the first message on.
+    """
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.header = b''
+        self.remaining = 0
+
+    def feed(self, data):
+        """Parse the next chunk of data sent by the server."""
+        pos = 0
+        while pos < len(data):
+            if self.remaining:
+                skipped = min(self.remaining, len(data) - pos)
+                self.remaining -= skipped
+                pos += skipped
+                continue
+            header = data[pos:pos + 5 - len(self.header)]
+            self.header += header
+            pos += len(header)
+            if len(self.header) == 5:
+                if self.header[:1] == b'Z':
+                    self.proxy.ready_for_query += 1
+                self.remaining = int.from_bytes(self.header[1:], 'big') - 4
+                self.header = b''
+
+
+class LatencyProxy:
+    """
+    TCP proxy to a Postgres server that delays the data sent in each
+    direction by latency_ms / 2, on its own event loop thread, and counts
+    the ReadyForQuery messages of the server in ready_for_query.
+
+    Parameters:
+    - host (str): Host of the server, or the directory of its Unix socket.
+    - port (int): Port of the server.
+    - latency_ms (float): Added round-trip time in milliseconds.
+    """
+
+    def __init__(self, host, port, latency_ms):
+        self.host = host
+        self.port = port
+        self.delay = latency_ms / 2000
+        self.loop = asyncio.new_event_loop()
+        self.thread = None
+        self.server = None
+        self.ready_for_query = 0
+
+    async def _open_server(self):
+        if self.host.startswith('/'):
+            return await asyncio.open_unix_connection(
+                f"{self.host}/.s.PGSQL.{self.port}")
+        return await asyncio.open_connection(self.host, self.port)
+
+    async def _forward(self, reader, writer, messages=None):
+        """
+        Copy reader to writer, delaying every chunk and keeping order, and
+        feed the chunks to messages when given.
+        """
+        pending = asyncio.Queue()
+
+        async def send():
+            while True:
+                due, data = await pending.get()
+                await asyncio.sleep(max(due - self.loop.time(), 0))
+                if not data:
+                    writer.close()
+                    return
+                writer.write(data)
+                await writer.drain()
+
+        sender = asyncio.create_task(send())
+        try:
+            while data := await reader.read(1 << 16):
+                if messages is not None:
+                    messages.feed(data)
+                pending.put_nowait((self.loop.time() + self.delay, data))
+        finally:
+            # an empty chunk closes the writer once the data before it is sent
+            pending.put_nowait((self.loop.time() + self.delay, b''))
+            await sender
+
+    async def _handle(self, client_reader, client_writer):
+        server_reader, server_writer = await self._open_server()
+        await asyncio.gather(
+            self._forward(client_reader, server_writer),
+            self._forward(server_reader, client_writer,
+                          ServerMessages(self)),
+            return_exceptions=True)
+
+    def start(self):
+        """Start the proxy and return the local port it listens on."""
+        ready = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(self.loop)
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, '127.0.0.1', 0))
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=serve, name="latency-proxy",
+                                       daemon=True)
+        self.thread.start()
+        ready.wait()
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _shutdown(self):
+        self.server.close()
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self):
+        """Stop the proxy, closing the connections still open through it."""
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+@contextlib.contextmanager
+def with_latency(dsn, latency_ms):
+    """
+    Yield a started LatencyProxy to the database of dsn, and the DSN that
+    connects through it.
+    """
+    params = conninfo_to_dict(dsn)
+    proxy = LatencyProxy(params.get('host') or 'localhost',
+                         int(params.get('port') or 5432), latency_ms)
+    port = proxy.start()
+    try:
+        yield proxy, make_conninfo(dsn, host='127.0.0.1', port=port,
+                                   sslmode='disable', gssencmode='disable')
+    finally:
+        proxy.stop()
+
+
+def load_both(proxy, dsn, hhs_file, cms_file, mode, chunksize, concurrency):
+    """
+    Load both files into an empty database through proxy.
+
+    Returns:
+    - tuple: Dicts of the seconds and of the round trips of each load.
+    """
+    def connect_async(**kwargs):
+        return psycopg.AsyncConnection.connect(dsn, **kwargs)
+
+    times = {}
+    round_trips = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        with psycopg.connect(dsn, autocommit=True) as conn:
+            start_trips = proxy.ready_for_query
+            start_time = time.perf_counter()
+            load_hhs.load_file(conn, hhs_file, mode, chunksize, force=True,
+                               cache=False, metrics_file=None,
+                               concurrency=concurrency,
+                               connect_async=connect_async)
+            times['hhs'] = time.perf_counter() - start_time
+            round_trips['hhs'] = proxy.ready_for_query - start_trips
+        with psycopg.connect(dsn, autocommit=True) as conn:
+            start_trips = proxy.ready_for_query
+            start_time = time.perf_counter()
+            load_quality.load_file(conn, cms_file, LAST_UPDATED, chunksize,
+                                   force=True, cache=False,
+                                   metrics_file=None,
+                                   concurrency=concurrency,
+                                   connect_async=connect_async)
+            times['cms'] = time.perf_counter() - start_time
+            round_trips['cms'] = proxy.ready_for_query - start_trips
+    return times, round_trips
+
+
+def bench_variants(results, args, hhs_file, cms_file, cms_rows, latency_ms):
+    """Load both files with every variant at one added latency."""
+    for variant, (use_pipeline, use_async) in VARIANTS.items():
+        reset_database(args.dsn)
+        loader_utils.USE_PIPELINE = use_pipeline
+        try:
+            with with_latency(args.dsn, latency_ms) as (proxy, dsn):
+                times, round_trips = load_both(
+                    proxy, dsn, hhs_file, cms_file, args.mode,
+                    args.chunksize, args.concurrency if use_async else None)
+        finally:
+            loader_utils.USE_PIPELINE = True
+        for loader, rows in [('hhs', args.rows), ('cms', cms_rows)]:
+            seconds = times[loader]
+            results.append({
+                'stage': f'{loader}_{variant}_{latency_ms}ms',
+                'rows': rows,
+                'latency_ms': latency_ms,
+                'seconds': round(seconds, 4),
+                'rows_per_sec': round(rows / seconds) if seconds > 0
+                else None,
+                'round_trips': round_trips[loader],
+            })
+            print(f"{loader} {variant:14} {latency_ms:>5}ms {rows:>9} rows "
+                  f"{seconds:>9.3f}s "
+                  f"{results[-1]['rows_per_sec'] or 0:>9} rows/sec "
+                  f"{round_trips[loader]:>7} round trips")
+
+
+def parse_args(argv):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark load throughput with and without pipeline "
+                    "mode over a high-latency link.")
+    parser.add_argument("--dsn", required=True,
+                        help="throwaway Postgres database; its tables are "
+                             "dropped")
+    parser.add_argument("--rows", type=int, default=20_000,
+                        help="rows in the synthetic HHS file")
+    parser.add_argument("--hospitals", type=int, default=5000,
+                        help="distinct hospitals in the generated files")
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0],
+                        help="round-trip latencies to add, in milliseconds")
+    parser.add_argument("--mode", choices=sorted(load_hhs.INSERT_MODES),
+                        default="executemany",
+                        help="how HHS rows are sent")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="chunk size of the loads")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="connections of the async variant")
+    parser.add_argument("--output", default="bench_pipeline.json",
+                        help="JSON file to write the results to")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    results = []
+    cms_rows = min(args.hospitals, args.rows, MAX_CMS_ROWS)
+    with tempfile.TemporaryDirectory() as data_dir:
+        hhs_file = os.path.join(data_dir, "hhs.csv")
+        cms_file = os.path.join(data_dir, "cms.csv")
+        synthetic_data.write_hhs_csv(hhs_file, args.rows, args.hospitals)
+        synthetic_data.write_cms_csv(cms_file, cms_rows)
+        for latency_ms in args.latency_ms:
+            bench_variants(results, args, hhs_file, cms_file, cms_rows,
+                           latency_ms)
+
+    report = {
+        'benchmark': 'pipeline',
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'psycopg': psycopg.__version__,
+        'libpq': psycopg.pq.version(),
+        'hospitals': args.hospitals,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Benchmark the reporting dashboard queries against a synthetic history.
+
+A throwaway Postgres database is seeded with N hospitals reporting for M
+weeks (a few percent of hospital-weeks are left out so that every report
+has rows), quarterly quality ratings and their rating periods, and the
+weekly rollups, COVID deltas and reporting status maintained by
+load-hhs.py. Every report in reports.REPORT_QUERIES is then run for a
+spread of selected weeks, recording the p50/p95 latency and the shared
+buffers hit and read by EXPLAIN (ANALYZE, BUFFERS).
+
+Passing several --weeks values seeds and measures each history length in
+turn, which shows how each report scales as history grows. All tables in
+the database are dropped first.
+
+This can be run like this:
+    python benchmarks/bench_reports.py --dsn postgresql://localhost/bench \\
+        --hospitals 5000 --weeks 52 104 208
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import pandas as pd  # noqa: E402
+import psycopg  # noqa: E402
+import loader_utils  # noqa: E402
+import queries  # noqa: E402
+import reports  # noqa: E402
+from bench_loading import git_commit, reset_database  # noqa: E402
+
+load_hhs = importlib.import_module("load-hhs")
+load_quality = importlib.import_module("load-quality")
+
+SEED_HOSPITALS_QUERY = """
+INSERT INTO HospitalSpecificDetails (
+    hospital_pk, state, hospital_name, address, city, zip, fips_code,
+    longitude, latitude
+)
+SELECT
+    lpad(i::text, 6, '0'),
+    (ARRAY['AL', 'CA', 'NY', 'TX', 'FL', 'PA', 'OH', 'WA', 'GA', 'IL'])
+        [1 + i %% 10],
+    'General Hospital ' || i,
+    i || ' Main Street',
+    'City ' || i %% 500,
+    lpad((10000 + i %% 89999)::text, 5, '0'),
+    (1 + i %% 56) * 1000 + i %% 1000,
+    -125 + (i * 0.37) %% 58,
+    25 + (i * 0.11) %% 24
+FROM generate_series(0, %(hospitals)s - 1) AS i;
+"""
+
+# The inner query keeps random() per row; the outer one derives the ICU
+# beds used from the ICU beds available so the CHECK constraint holds.
+SEED_LOGISTICS_QUERY = """
+INSERT INTO HospitalLogistics (
+    hospital_pk, collection_week,
+    all_adult_hospital_beds_7_day_avg,
+    all_pediatric_inpatient_beds_7_day_avg,
+    all_adult_hospital_inpatient_bed_occupied_7_day_avg,
+    all_pediatric_inpatient_bed_occupied_7_day_avg,
+    total_icu_beds_7_day_avg,
+    icu_beds_used_7_day_avg,
+    inpatient_beds_used_covid_7_day_avg,
+    staffed_icu_adult_patients_confirmed_covid_7_day_avg
+)
+SELECT
+    hospital_pk, collection_week,
+    adult_beds, pediatric_beds,
+    round(adult_beds * occupancy, 1), round(pediatric_beds * occupancy, 1),
+    icu_beds, round(icu_beds * occupancy, 1),
+    round(adult_beds * occupancy * covid_share, 1),
+    round(icu_beds * occupancy * covid_share, 1)
+FROM (
+    SELECT
+        h.hospital_pk,
+        w.week::date AS collection_week,
+        round((50 + random() * 400)::numeric, 1) AS adult_beds,
+        round((random() * 60)::numeric, 1) AS pediatric_beds,
+        round((5 + random() * 60)::numeric, 1) AS icu_beds,
+        random()::numeric AS occupancy,
+        (random() * 0.3)::numeric AS covid_share
+    FROM HospitalSpecificDetails h
+    CROSS JOIN generate_series(%(first_week)s::date, %(last_week)s::date,
+                               INTERVAL '1 week') AS w(week)
+    WHERE random() >= %(missing_rate)s
+) AS seeded;
+"""
+
+SEED_QUALITY_QUERY = """
+INSERT INTO HospitalQualityDetails (
+    hospital_pk, last_updated, hospital_overall_rating,
+    hospital_ownership, emergency_services
+)
+SELECT
+    h.hospital_pk,
+    d.updated::date,
+    CASE WHEN random() < 0.2 THEN NULL ELSE 1 + floor(random() * 5) END,
+    (ARRAY['Government - State', 'Proprietary',
+           'Voluntary non-profit - Private'])[1 + floor(random() * 3)::int],
+    random() < 0.9
+FROM HospitalSpecificDetails h
+CROSS JOIN generate_series(%(first_week)s::date, %(last_week)s::date,
+                           INTERVAL '3 months') AS d(updated);
+"""
+
+
+def history_weeks(weeks):
+    """Return the first and last of `weeks` Fridays up to today."""
+    today = datetime.date.today()
+    last_week = today - datetime.timedelta(days=(today.weekday() - 4) % 7)
+    return last_week - datetime.timedelta(weeks=weeks - 1), last_week
+
+
+def seed(dsn, hospitals, weeks, missing_rate):
+    """
+    Recreate the schema and fill it with a synthetic history.
+
+    Returns:
+    - list: Every collection week of the history, oldest first.
+    """
+    reset_database(dsn)
+    first_week, last_week = history_weeks(weeks)
+    params = {'hospitals': hospitals, 'first_week': first_week,
+              'last_week': last_week, 'missing_rate': missing_rate}
+    all_weeks = [first_week + datetime.timedelta(weeks=i)
+                 for i in range(weeks)]
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(SEED_HOSPITALS_QUERY, params)
+        loader_utils.ensure_logistics_partitions(
+            conn, {week.year for week in all_weeks}, set())
+        conn.execute(SEED_LOGISTICS_QUERY, params)
+        conn.execute(SEED_QUALITY_QUERY, params)
+        # every hospital has a rating updated on first_week
+        load_quality.refresh_rating_periods(conn, first_week)
+        loader_utils.refresh_weekly_summaries(conn, all_weeks)
+        loader_utils.refresh_covid_deltas(conn, all_weeks)
+        reported = pd.DataFrame(
+            conn.execute(queries.HOSPITAL_LOGISTICS_LOADED_KEYS_QUERY,
+                         {'weeks': all_weeks}).fetchall(),
+            columns=['hospital_pk', 'collection_week'])
+        load_hhs.update_reporting_status(conn, reported)
+        conn.execute("ANALYZE")
+    return all_weeks
+
+
+def selected_weeks(all_weeks, count):
+    """
+    Spread `count` selected weeks over the history, skipping the first week
+    so that every report has a previous week.
+    """
+    candidates = all_weeks[1:] or all_weeks
+    count = min(count, len(candidates))
+    step = (len(candidates) - 1) / max(count - 1, 1)
+    return sorted({candidates[round(i * step)] for i in range(count)})
+
+
+def explain_buffers(conn, report_id, selected_week):
+    """
+    Return the shared buffers hit and read and the execution time of one
+    run of a report, from EXPLAIN (ANALYZE, BUFFERS).
+    """
+    explain = conn.execute(
+        "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+        + reports.REPORT_QUERIES[report_id],
+        reports.report_params(selected_week)).fetchone()[0][0]
+    plan = explain['Plan']
+    return (plan.get('Shared Hit Blocks', 0),
+            plan.get('Shared Read Blocks', 0),
+            explain['Execution Time'])
+
+
+def bench_reports(dsn, weeks, hospitals, sample_weeks, repeat):
+    """Run every report for the sampled weeks and summarize each one."""
+    results = []
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        for report_id in reports.REPORT_QUERIES:
+            latencies = []
+            execution_ms = []
+            hit = read = 0
+            for week in sample_weeks:
+                for _ in range(repeat):
+                    start_time = time.perf_counter()
+                    result = reports.run_report(conn, report_id, week)
+                    latencies.append(time.perf_counter() - start_time)
+                week_hit, week_read, week_ms = explain_buffers(
+                    conn, report_id, week)
+                execution_ms.append(week_ms)
+                hit += week_hit
+                read += week_read
+            latencies = pd.Series(latencies) * 1000
+            results.append({
+                'stage': report_id,
+                'rows': hospitals * weeks,
+                'hospitals': hospitals,
+                'weeks': weeks,
+                'p50_ms': round(latencies.quantile(0.5), 2),
+                'p95_ms': round(latencies.quantile(0.95), 2),
+                'seconds': round(latencies.quantile(0.5) / 1000, 4),
+                'explain_execution_ms': round(
+                    pd.Series(execution_ms).median(), 2),
+                'shared_hit_blocks': hit // len(sample_weeks),
+                'shared_read_blocks': read // len(sample_weeks),
+                'result_rows': len(result),
+            })
+            r = results[-1]
+            print(f"{report_id} {hospitals:>7} hospitals {weeks:>4} weeks "
+                  f"p50 {r['p50_ms']:>9.2f}ms p95 {r['p95_ms']:>9.2f}ms "
+                  f"buffers hit {r['shared_hit_blocks']:>8} "
+                  f"read {r['shared_read_blocks']:>8}")
+    return results
+
+
+def parse_args(argv):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the reporting dashboard queries.")
+    parser.add_argument("--dsn", required=True,
+                        help="throwaway Postgres database; its tables are "
+                             "dropped")
+    parser.add_argument("--hospitals", type=int, default=5000,
+                        help="number of synthetic hospitals")
+    parser.add_argument("--weeks", type=int, nargs="+", default=[52],
+                        help="history lengths, in weeks, to seed and "
+                             "measure in turn")
+    parser.add_argument("--missing-rate", type=float, default=0.03,
+                        help="fraction of hospital-weeks left unreported")
+    parser.add_argument("--selected-weeks", type=int, default=5,
+                        help="number of selected weeks to run reports for")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs per report and selected week")
+    parser.add_argument("--output", default="bench_reports.json",
+                        help="JSON file to write the results to")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    results = []
+    for weeks in sorted(args.weeks):
+        start_time = time.perf_counter()
+        all_weeks = seed(args.dsn, args.hospitals, weeks, args.missing_rate)
+        print(f"Seeded {args.hospitals} hospitals x {weeks} weeks in "
+              f"{time.perf_counter() - start_time:.1f}s")
+        results += bench_reports(
+            args.dsn, weeks, args.hospitals,
+            selected_weeks(all_weeks, args.selected_weeks), args.repeat)
+
+    report = {
+        'benchmark': 'reports',
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'hospitals': args.hospitals,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Microbenchmark of building insert parameter rows from a processed frame.
+
+Compares the iterrows() construction the loaders used to run with
+loader_utils.row_tuples(), which builds the rows from column arrays, and
+reports the cost per 100k rows of each.
+
+This can be run like this:
+    python benchmarks/bench_row_tuples.py --rows 100000
+"""
+
+import argparse
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import pandas as pd  # noqa: E402
+import loader_utils  # noqa: E402
+import synthetic_data  # noqa: E402
+from bench_loading import git_commit  # noqa: E402
+
+load_hhs = importlib.import_module("load-hhs")
+
+
+def iterrows_tuples(data, columns):
+    """The row construction the insert paths used before row_tuples()."""
+    data = data.astype(object)
+    data = data.where(data.notna(), None)
+    return [tuple(row[col] for col in columns)
+            for _, row in data.iterrows()]
+
+
+METHODS = {
+    'iterrows': iterrows_tuples,
+    'row_tuples': loader_utils.row_tuples,
+}
+
+
+def best_time(func, repeat):
+    """Return the best of repeat timings of func()."""
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+
+def parse_args(argv):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Time building insert rows with iterrows() and "
+                    "row_tuples().")
+    parser.add_argument("--rows", type=int, default=100_000,
+                        help="rows in the synthetic HHS file")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per method; the best time is kept")
+    parser.add_argument("--output", default="bench_row_tuples.json",
+                        help="JSON file to write the results to")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    with tempfile.TemporaryDirectory() as data_dir:
+        hhs_file = os.path.join(data_dir, "hhs.csv")
+        synthetic_data.write_hhs_csv(hhs_file, args.rows)
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = load_hhs.load_data(hhs_file)
+
+    results = []
+    for table, columns in [
+            ('HospitalLogistics', load_hhs.HOSPITAL_LOGISTICS_COLUMNS),
+            ('HospitalSpecificDetails',
+             load_hhs.HOSPITAL_SPECIFIC_DETAILS_COLUMNS)]:
+        expected = loader_utils.row_tuples(data, columns)
+        for method, build in METHODS.items():
+            if method != 'row_tuples':
+                assert build(data, columns) == expected
+            seconds = best_time(lambda: build(data, columns), args.repeat)
+            per_100k = seconds * 100_000 / len(data)
+            results.append({
+                'stage': f'{method}_{table}',
+                'rows': len(data),
+                'seconds': round(seconds, 4),
+                'seconds_per_100k_rows': round(per_100k, 4),
+            })
+            print(f"{table:24} {method:10} {len(data):>8} rows "
+                  f"{seconds:>8.3f}s  {per_100k:>8.3f}s per 100k rows")
+
+    report = {
+        'benchmark': 'row_tuples',
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Check that the vectorized helper_functions.process_hhs_data() gives the
+same frame as the row-wise implementation it replaced.
+
+A synthetic HHS file with the dirty values of real exports (-999999, NA,
+malformed POINT strings, hospital keys that are not 6 characters long,
+invalid states and dates) is written, read back with read_csv and cleaned
+by both implementations. The frames must be identical: values, dtypes,
+None placement and index. The same is checked for frames whose addresses
+are all missing, as in a chunk of a chunked load without any address,
+which read_csv parses as float64, and all "NA".
+
+The row-wise version takes a minute or two on the default 1M rows.
+
+This can be run like this:
+    python benchmarks/check_process_hhs_equivalence.py --rows 1000000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+import time
+import warnings
+from datetime import date, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import helper_functions  # noqa: E402
+
+NUMERIC_COLUMNS = [
+    'all_adult_hospital_beds_7_day_avg',
+    'all_pediatric_inpatient_beds_7_day_avg',
+    'all_adult_hospital_inpatient_bed_occupied_7_day_avg',
+    'all_pediatric_inpatient_bed_occupied_7_day_avg',
+    'inpatient_beds_used_covid_7_day_avg',
+    'staffed_icu_adult_patients_confirmed_covid_7_day_avg',
+]
+STATES = np.array(['AL', 'CA', 'NY', 'TX', 'ny', 'C1', 'XYZ', 'NA', ''],
+                  dtype=object)
+MALFORMED_POINTS = np.array(['POINT (bad)', 'POINT (-86.1)', 'NA', '',
+                             'POINT ()'], dtype=object)
+
+# rows of the all-missing address cases, which are cleaned row by row too
+MISSING_ADDRESS_ROWS = 100_000
+
+
+def dirty(values, rng, rate, replacement):
+    """Replace a random fraction `rate` of the values with replacement."""
+    values[rng.random(len(values)) < rate] = replacement
+    return values
+
+
+def synthetic_hhs(rows, hospitals, rng):
+    """Generate a raw HHS frame with the dirty values of real exports."""
+    hospital_ids = np.arange(rows) % hospitals
+    pks = np.char.zfill(hospital_ids.astype(str), 6).astype(object)
+    dirty(pks, rng, 0.005, '12345')
+    dirty(pks, rng, 0.002, '1234567')
+    weeks = np.array([(date(2020, 1, 3) + timedelta(weeks=int(w)))
+                      .isoformat() for w in np.arange(rows) // hospitals],
+                     dtype=object)
+
+    data = {'hospital_pk': pks,
+            'collection_week': dirty(weeks, rng, 0.001, 'not a date')}
+    for column in NUMERIC_COLUMNS:
+        values = np.round(rng.gamma(2.0, 60.0, rows), 1).astype(object)
+        dirty(values, rng, 0.05, -999999)
+        data[column] = dirty(values, rng, 0.03, 'NA')
+    total_icu = np.round(rng.gamma(2.0, 15.0, rows), 1)
+    icu_used = np.round(total_icu * rng.random(rows), 1)
+    # a few rows report more ICU beds used than available
+    data['total_icu_beds_7_day_avg'] = total_icu
+    data['icu_beds_used_7_day_avg'] = np.where(
+        rng.random(rows) < 0.01, total_icu + 1, icu_used)
+
+    data['state'] = rng.choice(STATES, rows, p=[0.22] * 4 + [0.024] * 5)
+    for column, values in [
+            ('hospital_name', np.char.add('General Hospital ',
+                                          hospital_ids.astype(str))),
+            ('address', np.char.add(hospital_ids.astype(str),
+                                    ' Main Street')),
+            ('city', np.full(rows, 'Springfield'))]:
+        data[column] = dirty(values.astype(object), rng, 0.01, 'NA')
+    data['zip'] = (10000 + hospital_ids * 7 % 89999).astype(object)
+    data['fips_code'] = np.where(rng.random(rows) < 0.03, np.nan,
+                                 (1000 + hospital_ids * 13 % 55000))
+
+    longitude = np.round(-125 + hospital_ids * 0.37 % 58, 4).astype(str)
+    latitude = np.round(25 + hospital_ids * 0.11 % 24, 4).astype(str)
+    points = np.char.add(np.char.add('POINT (', longitude),
+                         np.char.add(' ', np.char.add(latitude, ')')))
+    points = points.astype(object)
+    malformed = rng.random(rows) < 0.02
+    points[malformed] = rng.choice(MALFORMED_POINTS, malformed.sum())
+    data['geocoded_hospital_address'] = points
+    return pd.DataFrame(data)
+
+
+def rowwise_extract_coordinates(point_str):
+    """extract_coordinates() as the row-wise implementation used it."""
+    if point_str == "NA" or pd.isna(point_str):
+        return None, None
+
+    coords = point_str.replace("POINT (", "").replace(")", "").split()
+    try:
+        longitude = float(coords[0])
+        latitude = float(coords[1])
+        return longitude, latitude
+    except (IndexError, ValueError) as e:
+        print(f"Error parsing coordinates: {e}")
+        return None, None
+
+
+def rowwise_process_hhs_data(data):
+    """Frozen copy of process_hhs_data() before it was vectorized."""
+    # Filter rows where 'hospital_pk' is 6 characters long
+    invalid_rows = data[data['hospital_pk'].str.len() != 6].index
+    data = data[data['hospital_pk'].str.len() == 6]
+    print(f"Removing rows: {invalid_rows} with invalid primary keys")
+
+    # Filter rows where total beds < used beds
+    invalid_rows = data[data['total_icu_beds_7_day_avg']
+                        < data['icu_beds_used_7_day_avg']].index
+    data = data[data['total_icu_beds_7_day_avg']
+                >= data['icu_beds_used_7_day_avg']]
+    print(f"Removing rows: {invalid_rows}\
+           where there are more reported beds used than in total")
+
+    # Convert 'collection_week' to datetime and retain only the date part
+    data['collection_week'] = \
+        pd.to_datetime(data['collection_week'], errors='coerce').\
+        apply(lambda x: x.date() if pd.notnull(x) else None)
+
+    # Replace invalid values in bed and occupancy columns with None
+    invalid_value_columns = [
+        'all_adult_hospital_beds_7_day_avg',
+        'all_pediatric_inpatient_beds_7_day_avg',
+        'all_adult_hospital_inpatient_bed_occupied_7_day_avg',
+        'all_pediatric_inpatient_bed_occupied_7_day_avg',
+        'total_icu_beds_7_day_avg',
+        'icu_beds_used_7_day_avg',
+        'inpatient_beds_used_covid_7_day_avg',
+        'staffed_icu_adult_patients_confirmed_covid_7_day_avg'
+    ]
+    for column in invalid_value_columns:
+        data[column] = data[column].\
+            apply(lambda x: None if x in ['NA', -999999] else x)
+        data[column] = data[column].\
+            apply(lambda x: None if x < 0 else x)
+
+    # Ensure 'state' values are two-letter alphabetical codes
+    data['state'] = data['state'].\
+        apply(lambda x: x if re.match(r'^[a-zA-Z]{2}$', str(x)) else None)
+
+    # Replace 'NA' values in categorical columns with None
+    categorical_columns = \
+        ['hospital_name', 'address', 'city', 'zip', 'fips_code']
+
+    for column in categorical_columns:
+        data[column] = data[column].apply(lambda x: None if x == "NA" else x)
+
+    # Extract longitude and latitude from 'geocoded_hospital_address'
+    data[['longitude', 'latitude']] = data['geocoded_hospital_address'].apply(
+        lambda x: pd.Series(rowwise_extract_coordinates(x))
+    )
+
+    return data
+
+
+def timed_clean(process, raw):
+    """Clean a copy of raw, silencing the per-row output of the cleaning."""
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        data = process(raw.copy())
+    return data, time.perf_counter() - start_time
+
+
+def check_case(name, raw):
+    """Clean raw with both implementations; return True if they agree."""
+    expected, rowwise_seconds = timed_clean(rowwise_process_hhs_data, raw)
+    actual, vectorized_seconds = timed_clean(
+        helper_functions.process_hhs_data, raw)
+    print(f"{name:20} {len(raw):>9} rows: row-wise {rowwise_seconds:>8.3f}s "
+          f"vectorized {vectorized_seconds:>8.3f}s")
+    try:
+        pd.testing.assert_frame_equal(actual, expected)
+    except AssertionError as e:
+        print(f"process_hhs_data() differs from the row-wise version:\n{e}")
+        return False
+    return True
+
+
+def parse_args(argv):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Check process_hhs_data() against its row-wise "
+                    "implementation.")
+    parser.add_argument("--rows", type=int, default=1_000_000,
+                        help="rows in the synthetic HHS file")
+    parser.add_argument("--hospitals", type=int, default=5000,
+                        help="distinct hospitals in the synthetic file")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the random dirty values")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as data_dir:
+        hhs_file = os.path.join(data_dir, "hhs.csv")
+        synthetic_hhs(args.rows, args.hospitals, rng).to_csv(hhs_file,
+                                                             index=False)
+        # real exports mix keys such as 01000F with numeric ones, so
+        # hospital_pk is never parsed as a number
+        raw = pd.read_csv(hhs_file, dtype={'hospital_pk': str})
+
+    sample = raw.head(MISSING_ADDRESS_ROWS)
+    cases = [
+        ('file', raw),
+        ('no addresses', sample.assign(geocoded_hospital_address=np.nan)),
+        ('"NA" addresses', sample.assign(geocoded_hospital_address="NA")),
+    ]
+    if not all([check_case(name, data) for name, data in cases]):
+        sys.exit(1)
+    print("The frames are identical.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare two JSON result files written by the benchmarks, for example from
+the base commit and a branch, and flag stages that got slower.
+
+This can be run like this:
+    python benchmarks/compare.py base.json branch.json --threshold 1.2
+"""
+
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    """Return the results of a benchmark file keyed by (stage, rows)."""
+    with open(path) as f:
+        report = json.load(f)
+    return report.get('commit'), {(r['stage'], r['rows']): r
+                                  for r in report['results']}
+
+
+def parse_args(argv):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Compare two benchmark result files.")
+    parser.add_argument("base", help="results of the reference run")
+    parser.add_argument("new", help="results of the run to check")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="flag stages whose time grew by this factor")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    base_commit, base = load_results(args.base)
+    new_commit, new = load_results(args.new)
+    print(f"base {base_commit}, new {new_commit}")
+    print(f"{'stage':32} {'rows':>9} {'base s':>9} {'new s':>9} "
+          f"{'ratio':>6}")
+    regressions = 0
+    for key in sorted(base.keys() & new.keys()):
+        before = base[key]['seconds']
+        after = new[key]['seconds']
+        ratio = after / before if before > 0 else float('inf')
+        flag = ''
+        if ratio > args.threshold:
+            flag = '  slower'
+            regressions += 1
+        print(f"{key[0]:32} {key[1]:>9} {before:>9.3f} {after:>9.3f} "
+              f"{ratio:>6.2f}{flag}")
+    if regressions:
+        print(f"{regressions} stages slower than {args.threshold}x")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Generate synthetic HHS and CMS CSV files for the benchmarks.
+
+The files have the columns read by load-hhs.py and load-quality.py and the
+kinds of dirty values found in the real exports: -999999 and 'NA' in the
+numeric columns, malformed 'POINT (...)' addresses, hospital_pk values that
+are not 6 characters long, invalid states and dates, and rows with more ICU
+beds used than available.
+
+HHS rows cycle through the hospitals week after week, so every
+(hospital_pk, collection_week) key is unique. The CMS file uses the same
+hospital_pk values, so quality ratings join the logistics rows.
+
+This can be run like this:
+    python benchmarks/synthetic_data.py hhs 100000 hhs-100k.csv
+    python benchmarks/synthetic_data.py cms 5000 cms-5k.csv
+"""
+
+import argparse
+import sys
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+# rows generated and written at a time, to bound memory for large files
+BLOCK_SIZE = 500_000
+
+HHS_NUMERIC_COLUMNS = [
+    'all_adult_hospital_beds_7_day_avg',
+    'all_pediatric_inpatient_beds_7_day_avg',
+    'all_adult_hospital_inpatient_bed_occupied_7_day_avg',
+    'all_pediatric_inpatient_bed_occupied_7_day_avg',
+    'inpatient_beds_used_covid_7_day_avg',
+    'staffed_icu_adult_patients_confirmed_covid_7_day_avg',
+]
+
+STATES = np.array(['AL', 'CA', 'NY', 'TX', 'FL', 'PA', 'OH', 'WA', 'ny',
+                   'Tx'], dtype=object)
+INVALID_STATES = np.array(['C1', 'XYZ', 'NA', ''], dtype=object)
+MALFORMED_POINTS = np.array(['POINT (bad)', 'POINT (-86.1)', 'NA', '',
+                             'POINT (1 x)'], dtype=object)
+OWNERSHIPS = np.array(['Government - State', 'Proprietary',
+                       'Voluntary non-profit - Private'], dtype=object)
+
+FIRST_WEEK = date(2020, 1, 3)
+
+
+def hospital_pks(hospital_ids):
+    """Return the 6-character hospital_pk of each hospital id."""
+    return np.char.zfill(hospital_ids.astype(str), 6).astype(object)
+
+
+def dirty(values, rng, rate, replacement):
+    """Replace a random fraction `rate` of the values with replacement."""
+    values[rng.random(len(values)) < rate] = replacement
+    return values
+
+
+def hhs_block(start, size, hospitals, rng):
+    """Generate the HHS rows start to start + size as a DataFrame."""
+    row_ids = np.arange(start, start + size)
+    hospital_ids = row_ids % hospitals
+    week_offsets = row_ids // hospitals
+
+    pks = hospital_pks(hospital_ids)
+    dirty(pks, rng, 0.005, '12345')
+    dirty(pks, rng, 0.002, '1234567')
+
+    weeks = np.array([(FIRST_WEEK + timedelta(weeks=int(w))).isoformat()
+                      for w in range(week_offsets[0], week_offsets[-1] + 1)],
+                     dtype=object)
+    collection_week = weeks[week_offsets - week_offsets[0]]
+    dirty(collection_week, rng, 0.001, 'not a date')
+
+    data = {'hospital_pk': pks, 'collection_week': collection_week}
+    for column in HHS_NUMERIC_COLUMNS:
+        values = np.round(rng.gamma(2.0, 60.0, size), 1).astype(object)
+        dirty(values, rng, 0.05, -999999)
+        dirty(values, rng, 0.03, 'NA')
+        data[column] = values
+    total_icu = np.round(rng.gamma(2.0, 15.0, size), 1)
+    icu_used = np.round(total_icu * rng.random(size), 1)
+    # a few rows report more ICU beds used than available
+    icu_used = np.where(rng.random(size) < 0.01, total_icu + 1, icu_used)
+    data['total_icu_beds_7_day_avg'] = total_icu
+    data['icu_beds_used_7_day_avg'] = icu_used
+
+    state = STATES[hospital_ids % len(STATES)].copy()
+    invalid_state = rng.random(size) < 0.01
+    state[invalid_state] = rng.choice(INVALID_STATES, invalid_state.sum())
+    data['state'] = state
+    data['hospital_name'] = dirty(
+        np.char.add('General Hospital ', hospital_ids.astype(str))
+        .astype(object), rng, 0.01, 'NA')
+    data['address'] = dirty(
+        np.char.add(hospital_ids.astype(str), ' Main Street').astype(object),
+        rng, 0.01, 'NA')
+    data['city'] = dirty(np.full(size, 'Springfield', dtype=object), rng,
+                         0.01, 'NA')
+    data['zip'] = (10000 + hospital_ids * 7 % 89999).astype(object)
+    fips = (1000 + hospital_ids * 13 % 55000).astype(float)
+    data['fips_code'] = np.where(rng.random(size) < 0.03, np.nan, fips)
+
+    longitude = np.round(-125 + hospital_ids * 0.37 % 58, 4)
+    latitude = np.round(25 + hospital_ids * 0.11 % 24, 4)
+    points = np.char.add(
+        np.char.add(np.char.add('POINT (', longitude.astype(str)), ' '),
+        np.char.add(latitude.astype(str), ')')).astype(object)
+    malformed = rng.random(size) < 0.02
+    points[malformed] = rng.choice(MALFORMED_POINTS, malformed.sum())
+    data['geocoded_hospital_address'] = points
+    return pd.DataFrame(data)
+
+
+def write_hhs_csv(path, rows, hospitals=5000, seed=0):
+    """
+    Write a synthetic HHS CSV file.
+
+    Parameters:
+    - path (str): Output file.
+    - rows (int): Number of rows, e.g. 10_000 to 5_000_000.
+    - hospitals (int): Number of distinct hospitals; every hospital reports
+        once per week until `rows` rows were written.
+    - seed (int): Seed of the random dirty values.
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, BLOCK_SIZE):
+        block = hhs_block(start, min(BLOCK_SIZE, rows - start),
+                          min(hospitals, rows), rng)
+        block.to_csv(path, mode='w' if start == 0 else 'a',
+                     header=start == 0, index=False)
+
+
+def write_cms_csv(path, rows, seed=0):
+    """
+    Write a synthetic CMS hospital quality CSV file with one row per
+    hospital, using the same hospital_pk values as write_hhs_csv.
+    """
+    rng = np.random.default_rng(seed)
+    hospital_ids = np.arange(rows)
+    facility_ids = hospital_pks(hospital_ids)
+    dirty(facility_ids, rng, 0.005, '1234567')
+    ratings = rng.integers(1, 6, rows).astype(str).astype(object)
+    dirty(ratings, rng, 0.2, 'Not Available')
+    zips = (10000 + hospital_ids * 7 % 89999).astype(float)
+    data = pd.DataFrame({
+        'Facility ID': facility_ids,
+        'Facility Name': np.char.add('General Hospital ',
+                                     hospital_ids.astype(str)),
+        'Address': np.char.add(hospital_ids.astype(str), ' Main Street'),
+        'City': 'Springfield',
+        'State': STATES[hospital_ids % len(STATES)],
+        'ZIP Code': np.where(rng.random(rows) < 0.01, np.nan, zips),
+        'Hospital Ownership': rng.choice(OWNERSHIPS, rows),
+        'Emergency Services': rng.choice(['Yes', 'No'], rows),
+        'Hospital overall rating': ratings,
+    })
+    data.to_csv(path, index=False)
+
+
+def parse_args(argv):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic HHS or CMS CSV file.")
+    parser.add_argument("kind", choices=["hhs", "cms"])
+    parser.add_argument("rows", type=int, help="number of rows")
+    parser.add_argument("path", help="output CSV file")
+    parser.add_argument("--hospitals", type=int, default=5000,
+                        help="distinct hospitals in an HHS file")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    if args.kind == "hhs":
+        write_hhs_csv(args.path, args.rows, args.hospitals, args.seed)
+    else:
+        write_cms_csv(args.path, args.rows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
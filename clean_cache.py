@@ -0,0 +1,100 @@
+"""
+This module contains the Parquet cache of cleaned loader inputs, so that
+reloading a file (for example into a database recreated by
+create-tables.py) skips CSV parsing and preprocessing.
+
+A cache entry is a directory of Parquet files, one per cleaned chunk, named
+after the loader, the SHA-256 of the source file, the version of the
+cleaning code in helper_functions.py and the version of the loader script,
+which holds the read parameters such as CSV_DTYPES. Changing the file, the
+cleaning code or the loader therefore misses the cache instead of reading
+stale data.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import pyarrow as pa
+import pyarrow.parquet as pq
+import helper_functions
+
+CACHE_DIR = os.environ.get("LOADER_CACHE_DIR", ".clean_cache")
+
+
+def code_version(path):
+    """Return a short hash of the code in the Python file at path."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+CLEANING_VERSION = code_version(helper_functions.__file__)
+
+
+def cache_path(name, content_hash, loader_version):
+    """
+    Return the cache directory of a source file.
+
+    Parameters:
+    - name (str): Loader-specific part of the key, e.g. 'hhs'. Anything
+        else the cleaned data depends on must be part of it.
+    - content_hash (str): loader_utils.file_hash() of the source file.
+    - loader_version (str): code_version() of the loader script, which
+        reads and cleans the chunks, e.g. with its CSV_DTYPES.
+    """
+    return os.path.join(
+        CACHE_DIR,
+        f"{name}-{content_hash}-{CLEANING_VERSION}-{loader_version}")
+
+
+def cached_chunks(name, content_hash, loader_version, read_chunks, columns):
+    """
+    Yield the cleaned chunks of a source file, from the cache if possible.
+
+    On a hit only the given columns are read from the Parquet files. On a
+    miss the chunks from read_chunks() are yielded unchanged and written to
+    the cache; the entry only becomes visible once every chunk was written,
+    so an interrupted load never leaves a partial entry behind.
+
+    Parameters:
+    - name (str): Loader-specific part of the cache key.
+    - content_hash (str): loader_utils.file_hash() of the source file.
+    - loader_version (str): code_version() of the loader script.
+    - read_chunks (callable): Called without arguments on a miss; returns an
+        iterable of cleaned pd.DataFrame chunks.
+    - columns (list): Columns the loader needs from each chunk.
+
+    Yields:
+    - pd.DataFrame: The cleaned chunks, with at least the given columns.
+    """
+    path = cache_path(name, content_hash, loader_version)
+    if os.path.isdir(path):
+        logging.info(f"Reading cleaned data from the cache in {path}")
+        for part in sorted(os.listdir(path)):
+            yield pq.read_table(os.path.join(path, part),
+                                columns=columns).to_pandas()
+        return
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    caching = True
+    try:
+        for part_number, data in enumerate(read_chunks(), start=1):
+            if caching:
+                part = os.path.join(tmp_path, f"part-{part_number:05}.parquet")
+                try:
+                    pq.write_table(
+                        pa.Table.from_pandas(data, preserve_index=False), part)
+                except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                    logging.warning(f"Not caching {path}: {e}")
+                    caching = False
+            yield data
+        if caching:
+            try:
+                os.rename(tmp_path, path)
+                logging.info(f"Cached cleaned data in {path}")
+            except OSError:
+                # another loader cached the same file first
+                pass
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
@@ -3,6 +3,25 @@ import psycopg
 from psycopg import errors
 import credentials
 
+# Tables created by this script, in creation order
+TABLE_CREATE_QUERIES = [
+    ('HospitalSpecificDetails',
+     queries.HOSPITAL_SPECIFIC_DETAILS_CREATE_QUERY),
+    ('HospitalLogistics', queries.HOSPITAL_LOGISTICS_CREATE_QUERY),
+    ('HospitalQualityDetails', queries.HOSPITAL_QUALITY_DETAILS_CREATE_QUERY),
+    ('LoadHistory', queries.LOAD_HISTORY_CREATE_QUERY),
+    ('WeeklyLogisticsSummary', queries.WEEKLY_LOGISTICS_SUMMARY_CREATE_QUERY),
+    ('WeeklyStateLogisticsSummary',
+     queries.WEEKLY_STATE_LOGISTICS_SUMMARY_CREATE_QUERY),
+    ('HospitalWeeklyCovidDelta',
+     queries.HOSPITAL_WEEKLY_COVID_DELTA_CREATE_QUERY),
+    ('StateWeeklyCovidDelta', queries.STATE_WEEKLY_COVID_DELTA_CREATE_QUERY),
+    ('HospitalReportingStatus',
+     queries.HOSPITAL_REPORTING_STATUS_CREATE_QUERY),
+    ('HospitalQualityRatingPeriods',
+     queries.HOSPITAL_QUALITY_RATING_PERIODS_CREATE_QUERY),
+]
+
 
 def main():
     conn = psycopg.connect(
@@ -16,14 +35,9 @@ def main():
 
     try:
         with conn.transaction():
-            cur.execute(queries.HOSPITAL_SPECIFIC_DETAILS_CREATE_QUERY)
-            print("Successfully created HospitalSpecificDetails table.")
-
-            cur.execute(queries.HOSPITAL_LOGISTICS_CREATE_QUERY)
-            print("Successfully created HospitalLogistics table.")
-
-            cur.execute(queries.HOSPITAL_QUALITY_DETAILS_CREATE_QUERY)
-            print("Successfully created HospitalQualityDetails table.")
+            for table_name, create_query in TABLE_CREATE_QUERIES:
+                cur.execute(create_query)
+                print(f"Successfully created {table_name} table.")
 
     except errors.DatabaseError as e:
         print(f"Database error occurred: {e}")
@@ -1,5 +1,4 @@
 import pandas as pd
-import re
 
 
 def extract_coordinates(point_str):
@@ -73,16 +72,18 @@ def process_hhs_data(data):
     invalid_rows = data[data['total_icu_beds_7_day_avg']
                         < data['icu_beds_used_7_day_avg']].index
     data = data[data['total_icu_beds_7_day_avg']
-                >= data['icu_beds_used_7_day_avg']]
+                >= data['icu_beds_used_7_day_avg']].copy()
     print(f"Removing rows: {invalid_rows}\
            where there are more reported beds used than in total")
 
     # Convert 'collection_week' to datetime and retain only the date part
-    data['collection_week'] = \
-        pd.to_datetime(data['collection_week'], errors='coerce').\
-        apply(lambda x: x.date() if pd.notnull(x) else None)
+    collection_week = pd.to_datetime(data['collection_week'], errors='coerce')
+    data['collection_week'] = collection_week.dt.date.astype(object).\
+        where(collection_week.notna(), None)
 
-    # Replace invalid values in bed and occupancy columns with None
+    # Replace invalid values in bed and occupancy columns with None.
+    # 'NA' is parsed as NaN by read_csv, and -999999 is caught by the
+    # negative value mask.
     invalid_value_columns = [
         'all_adult_hospital_beds_7_day_avg',
         'all_pediatric_inpatient_beds_7_day_avg',
@@ -94,26 +95,44 @@ def process_hhs_data(data):
         'staffed_icu_adult_patients_confirmed_covid_7_day_avg'
     ]
     for column in invalid_value_columns:
-        data[column] = data[column].\
-            apply(lambda x: None if x in ['NA', -999999] else x)
-        data[column] = data[column].\
-            apply(lambda x: None if x < 0 else x)
+        values = pd.to_numeric(data[column], errors='coerce')
+        data[column] = values.mask(values < 0)
 
     # Ensure 'state' values are two-letter alphabetical codes
-    data['state'] = data['state'].\
-        apply(lambda x: x if re.match(r'^[a-zA-Z]{2}$', str(x)) else None)
+    valid_state = data['state'].astype(str).str.fullmatch(r'[a-zA-Z]{2}')
+    data['state'] = data['state'].astype(object).where(valid_state, None)
 
     # Replace 'NA' values in categorical columns with None
     categorical_columns = \
         ['hospital_name', 'address', 'city', 'zip', 'fips_code']
 
     for column in categorical_columns:
-        data[column] = data[column].apply(lambda x: None if x == "NA" else x)
-
-    # Extract longitude and latitude from 'geocoded_hospital_address'
-    data[['longitude', 'latitude']] = data['geocoded_hospital_address'].apply(
-        lambda x: pd.Series(extract_coordinates(x))
-    )
+        is_na = data[column] == "NA"
+        if is_na.any():
+            data[column] = data[column].astype(object).where(~is_na, None)
+
+    # Extract longitude and latitude from 'geocoded_hospital_address',
+    # using the same tokenisation as extract_coordinates
+    # as object, so that the .str accessor also works on a chunk without
+    # any address, which read_csv parses as float64
+    point = data['geocoded_hospital_address'].astype(object)
+    coords = point.where(point != "NA").\
+        str.replace("POINT (", "", regex=False).\
+        str.replace(")", "", regex=False).\
+        str.extract(r'^\s*(\S+)\s+(\S+)')
+    longitude = pd.to_numeric(coords[0], errors='coerce')
+    latitude = pd.to_numeric(coords[1], errors='coerce')
+    invalid_coords = longitude.isna() | latitude.isna()
+    unparsed = invalid_coords & point.notna() & (point != "NA")
+    if unparsed.any():
+        print(f"Error parsing coordinates for rows: {data[unparsed].index}")
+    data['longitude'] = longitude.mask(invalid_coords)
+    data['latitude'] = latitude.mask(invalid_coords)
+    if invalid_coords.all():
+        # like extract_coordinates per row, no coordinates at all gives
+        # columns of None rather than of NaN
+        data['longitude'] = None
+        data['latitude'] = None
 
     return data
 
@@ -136,10 +155,11 @@ def process_cms_data(data):
     - The function performs the following transformations:
       - Renames columns to match database schema.
       - Filters for valid hospital primary keys (6 characters).
-      - Converts 'emergency_services' to a boolean
+      - Converts 'emergency_services' to a nullable boolean
         (True if "Yes", False if "No").
-      - Converts 'hospital_overall_rating' to an integer; replaces non-numeric
-        values with NaN.
+      - Converts 'hospital_overall_rating' to a nullable integer (Int64);
+        replaces non-numeric values with <NA>.
+      - Stores 'zip' and the other text columns as nullable strings.
       - Selects only columns of interest for further steps.
       - Extracts longitude and latitude from 'geocoded_hospital_address'.
     """
@@ -176,22 +196,31 @@ def process_cms_data(data):
     # data transformtions
 
     # ensure that we do not take any row with bizarre hospital_pk value
-    data['valid_pk'] = data["hospital_pk"].\
-        apply(lambda x: True if len(x) <= 6 else False)
-    invalid_rows = data[data["hospital_pk"].apply(lambda x: len(x) > 6)].index
+    data['hospital_pk'] = data['hospital_pk'].astype('string')
+    data['valid_pk'] = data['hospital_pk'].str.len() <= 6
+    invalid_rows = data[~data['valid_pk']].index
 
     print(f"Removing rows: {invalid_rows} with invalid primary keys")
 
-    data = data[data['valid_pk']]
+    data = data[data['valid_pk']].copy()
 
     # convert emergency_services is 'Yes'/'No', convert to boolean
-    data['emergency_services'] = data['emergency_services'].\
-        apply(lambda x: True if x.lower() == 'yes' else False)
-    # hospital_overall_rating is in string, convert it to int
-    data['hospital_overall_rating'] = data['hospital_overall_rating'].\
-        apply(lambda x: int(x) if x.isnumeric() else None)
-    # convert zip to string
-    data['zip'] = data['zip'].apply(lambda x: str(x))
+    emergency_services = data['emergency_services'].astype('string')
+    data['emergency_services'] = \
+        (emergency_services.str.lower() == 'yes').astype('boolean')
+    # hospital_overall_rating is in string ('Not Available' when missing),
+    # convert it to a nullable integer
+    rating = pd.to_numeric(data['hospital_overall_rating'], errors='coerce')
+    data['hospital_overall_rating'] = \
+        rating.where(rating % 1 == 0).astype('Int64')
+    # convert zip to string, dropping the '.0' of float-parsed codes
+    if pd.api.types.is_numeric_dtype(data['zip']):
+        data['zip'] = data['zip'].astype('Int64')
+    data['zip'] = data['zip'].astype('string')
+    # keep free-text columns as nullable strings
+    for column in ['hospital_name', 'address', 'city', 'state',
+                   'hospital_ownership']:
+        data[column] = data[column].astype('string')
 
     # take only columns of interest
     data = data[columns]
@@ -1,14 +1,60 @@
+import argparse
 import sys
+import time
+from datetime import date
 import pandas as pd
 import psycopg
 from psycopg import errors
-import credentials
 import queries
 import helper_functions
+import loader_utils
+import async_loader
+import clean_cache
+import load_metrics
 import logging
 
 BATCH_SIZE = 1000
 
+# read hospital_pk as text so that chunks with only numeric keys keep their
+# leading zeros and still support the .str accessor used in preprocessing
+CSV_DTYPES = {'hospital_pk': str}
+
+# bit 1 of HospitalReportingStatus.reported_weeks; earlier collection weeks
+# are loaded into HospitalLogistics but not tracked there
+REPORTING_EPOCH = date(2020, 1, 3)
+
+HOSPITAL_LOGISTICS_COLUMNS = [
+    'hospital_pk',
+    'collection_week',
+    'all_adult_hospital_beds_7_day_avg',
+    'all_pediatric_inpatient_beds_7_day_avg',
+    'all_adult_hospital_inpatient_bed_occupied_7_day_avg',
+    'all_pediatric_inpatient_bed_occupied_7_day_avg',
+    'total_icu_beds_7_day_avg',
+    'icu_beds_used_7_day_avg',
+    'inpatient_beds_used_covid_7_day_avg',
+    'staffed_icu_adult_patients_confirmed_covid_7_day_avg'
+]
+
+HOSPITAL_SPECIFIC_DETAILS_COLUMNS = [
+    'hospital_pk',
+    'state',
+    'hospital_name',
+    'address',
+    'city',
+    'zip',
+    'fips_code',
+    'longitude',
+    'latitude'
+]
+
+# columns read back from the cache of cleaned data
+LOADED_COLUMNS = list(dict.fromkeys(HOSPITAL_LOGISTICS_COLUMNS +
+                                    HOSPITAL_SPECIFIC_DETAILS_COLUMNS))
+
+# per-batch and per-run metrics are appended to this JSON lines file
+METRICS_FILE = 'hhs_load_metrics.jsonl'
+
 # logging configuration
 logging.basicConfig(
     filename='hhs_data_loading.log',
@@ -17,11 +63,16 @@ logging.basicConfig(
 )
 
 
-def load_data(file_path):
+def load_data(file_path, metrics=None):
     """Load and preprocess CSV data."""
+    metrics = metrics or load_metrics.LoadMetrics('hhs', file_path)
     try:
-        data = pd.read_csv(file_path)
-        data = helper_functions.process_hhs_data(data)
+        with metrics.stage('csv_read'):
+            raw_data = pd.read_csv(file_path, dtype=CSV_DTYPES)
+        with metrics.stage('cleaning'):
+            data = helper_functions.process_hhs_data(raw_data)
+        metrics.count('rows_read', len(raw_data))
+        metrics.count('rows_rejected_by_cleaning', len(raw_data) - len(data))
         logging.info(f"Data loaded and preprocessed from {file_path}")
         return data
     except Exception as e:
@@ -46,96 +97,515 @@ def batch_insert_data(cursor, query, data, batch_size, table_name):
             cursor.connection.rollback()
 
 
+def iter_chunks(file_path, chunksize, metrics=None):
+    """
+    Read, preprocess and yield the CSV file chunksize rows at a time, so
+    that only one chunk is held in memory.
+    """
+    metrics = metrics or load_metrics.LoadMetrics('hhs', file_path)
+    try:
+        reader = pd.read_csv(file_path, dtype=CSV_DTYPES,
+                             chunksize=chunksize)
+        for chunk_number, chunk in enumerate(
+                metrics.timed_iter('csv_read', reader), start=1):
+            with metrics.stage('cleaning'):
+                data = helper_functions.process_hhs_data(chunk)
+            metrics.count('rows_read', len(chunk))
+            metrics.count('rows_rejected_by_cleaning',
+                          len(chunk) - len(data))
+            logging.info(f"Chunk {chunk_number}: read {len(chunk)} rows, "
+                         f"{len(data)} rows left after preprocessing")
+            yield data
+    except Exception as e:
+        logging.error(f"Error loading data from {file_path}: {e}")
+        raise
+
+
+def drop_missing_weeks(data, metrics):
+    """
+    Drop the rows whose collection_week could not be parsed. It is part of
+    the primary key and selects the partition of HospitalLogistics, so such
+    rows can never be inserted; they are counted as rejected by cleaning.
+    """
+    missing = data['collection_week'].isna()
+    if not missing.any():
+        return data
+    logging.warning(f"Removing {missing.sum()} rows without a valid "
+                    "collection_week")
+    metrics.count('rows_rejected_by_cleaning', int(missing.sum()))
+    return data[~missing]
+
+
+def insert_logistics_executemany(cursor, values):
+    """
+    Insert HospitalLogistics rows with one statement per row. The number of
+    rows inserted is left in cursor.rowcount, which in pipeline mode is
+    only complete once the pipeline has synced.
+    """
+    cursor.executemany(queries.HOSPITAL_LOGISTICS_INSERT_QUERY, values)
+
+
+def insert_logistics_copy(cursor, values):
+    """
+    Stream HospitalLogistics rows into the staging table with COPY and merge
+    them into HospitalLogistics with a single INSERT ... SELECT. The number
+    of rows inserted is left in cursor.rowcount.
+
+    The merge runs against HospitalLogistics itself, so foreign key and CHECK
+    constraints are enforced exactly as in the executemany path. Must be
+    called inside a transaction so the staging rows are cleared on commit.
+    """
+    with cursor.copy(queries.HOSPITAL_LOGISTICS_STAGING_COPY_QUERY) as copy:
+        for row in values:
+            copy.write_row(row)
+    cursor.execute(queries.HOSPITAL_LOGISTICS_MERGE_QUERY)
+
+
+INSERT_MODES = {
+    'executemany': insert_logistics_executemany,
+    'copy': insert_logistics_copy,
+}
+
+
+async def insert_logistics_executemany_async(cursor, values):
+    """Asynchronous insert_logistics_executemany()."""
+    await cursor.executemany(queries.HOSPITAL_LOGISTICS_INSERT_QUERY, values)
+
+
+async def insert_logistics_copy_async(cursor, values):
+    """Asynchronous insert_logistics_copy()."""
+    async with cursor.copy(queries.HOSPITAL_LOGISTICS_STAGING_COPY_QUERY) \
+            as copy:
+        for row in values:
+            await copy.write_row(row)
+    await cursor.execute(queries.HOSPITAL_LOGISTICS_MERGE_QUERY)
+
+
+ASYNC_INSERT_MODES = {
+    'executemany': insert_logistics_executemany_async,
+    'copy': insert_logistics_copy_async,
+}
+
+
+def parse_args(argv):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Load HHS data into the HospitalLogistics table.")
+    parser.add_argument("csv_file", help="path to the HHS CSV file")
+    parser.add_argument("--mode", choices=sorted(INSERT_MODES),
+                        default="executemany",
+                        help="how rows are sent to HospitalLogistics")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="stream the CSV file this many rows at a time "
+                             "instead of reading it all into memory")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="clean the next chunk while a background "
+                             "thread loads the current one "
+                             "(requires --chunksize)")
+    parser.add_argument("--force", action="store_true",
+                        help="load the file even if the same content was "
+                             "already loaded")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="always parse and clean the CSV file instead "
+                             "of using the cache of cleaned data")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="insert batches on several asynchronous "
+                             "connections at once")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="connections used by --async")
+    parser.add_argument("--metrics-file", default=METRICS_FILE,
+                        help="JSON lines file to append stage metrics to")
+    parser.add_argument("--prometheus-file", default=None,
+                        help="also write the run metrics to this "
+                             "Prometheus textfile")
+    args = parser.parse_args(argv)
+    if args.pipeline and not args.chunksize:
+        parser.error("--pipeline requires --chunksize")
+    if args.pipeline and args.use_async:
+        parser.error("--pipeline cannot be combined with --async, which "
+                     "already cleans chunks while batches are inserted")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    return args
+
+
+def insert_new_hospitals(conn, cur, batch_df, known_pks):
+    """
+    Insert the hospitals of a batch that are not in known_pks into
+    HospitalSpecificDetails, and add them to known_pks.
+    """
+    new_hospitals = loader_utils.select_new_hospitals(batch_df, known_pks)
+    if new_hospitals.empty:
+        return
+    hospital_specific_details_values = loader_utils.row_tuples(
+        new_hospitals, HOSPITAL_SPECIFIC_DETAILS_COLUMNS)
+    with loader_utils.batch_transaction(conn):
+        cur.executemany(queries.HOSPITAL_SPECIFIC_DETAILS_INSERT_QUERY,
+                        hospital_specific_details_values)
+    known_pks.update(new_hospitals['hospital_pk'])
+    logging.info(f"Inserted {len(new_hospitals)} new hospitals into "
+                 "HospitalSpecificDetails table")
+
+
+def reporting_status_params(batch_df):
+    """
+    Return the parameters of HOSPITAL_REPORTING_STATUS_UPDATE_QUERY for a
+    batch, or None if no row of the batch has both keys and a week on or
+    after REPORTING_EPOCH.
+    """
+    reported = batch_df[['hospital_pk', 'collection_week']].dropna()
+    reported = reported[pd.to_datetime(reported['collection_week'])
+                        >= pd.Timestamp(REPORTING_EPOCH)]
+    if reported.empty:
+        return None
+    return {'hospital_pks': reported['hospital_pk'].tolist(),
+            'weeks': reported['collection_week'].tolist()}
+
+
+def update_reporting_status(conn, batch_df):
+    """
+    Mark the collection weeks of a batch as reported in
+    HospitalReportingStatus. Runs in the transaction that inserted the
+    batch, so the status never runs ahead of HospitalLogistics. It uses its
+    own cursor, so the batch cursor's rowcount is kept.
+    """
+    params = reporting_status_params(batch_df)
+    if params:
+        conn.execute(queries.HOSPITAL_REPORTING_STATUS_UPDATE_QUERY, params)
+
+
+def load_chunk(conn, cur, data, insert_logistics, known_pks=None,
+               metrics=None):
+    """
+    Insert one preprocessed chunk into HospitalLogistics in batches.
+
+    When known_pks is given, hospitals missing from it are inserted into
+    HospitalSpecificDetails before each batch, so the foreign key violation
+    retry below is only a fallback.
+
+    In executemany mode each batch transaction, from BEGIN to COMMIT, is
+    sent in one pipeline that syncs once, so its statements do not wait
+    for each other's results.
+    """
+    metrics = metrics or load_metrics.LoadMetrics('hhs')
+    # COPY cannot run in pipeline mode
+    use_pipeline = insert_logistics is not insert_logistics_copy
+
+    def insert_batch(batch_df, hospital_logistics_values):
+        # A ForeignKeyViolation is raised at the latest when the pipeline
+        # syncs on leaving the block, so it is always attributed to this batch
+        with loader_utils.batch_transaction(conn, use_pipeline):
+            insert_logistics(cur, hospital_logistics_values)
+            update_reporting_status(conn, batch_df)
+        return cur.rowcount
+
+    for row_index in range(0, len(data), BATCH_SIZE):
+        batch_df = data[row_index:row_index + BATCH_SIZE]
+        logging.info(f"Running process for batch "
+                     f"{(row_index // BATCH_SIZE) + 1}")
+
+        if known_pks is not None:
+            with metrics.stage('hospital_insert'):
+                insert_new_hospitals(conn, cur, batch_df, known_pks)
+
+        with metrics.stage('tuple_building'):
+            hospital_logistics_values = loader_utils.row_tuples(
+                batch_df, HOSPITAL_LOGISTICS_COLUMNS)
+
+        start_time = time.perf_counter()
+        fk_fallback = False
+        try:
+            inserted = insert_batch(batch_df, hospital_logistics_values)
+            logging.info("Successfully inserted batch with "
+                         f"{len(batch_df)} "
+                         "rows into HospitalLogistics table")
+        except errors.ForeignKeyViolation:
+            fk_fallback = True
+            logging.warning("Foreign key violation encountered.")
+            logging.info("Inserting into HospitalSpecificDetails.")
+            hospital_specific_details_values = loader_utils.row_tuples(
+                batch_df, HOSPITAL_SPECIFIC_DETAILS_COLUMNS)
+
+            # insert in primary key order so that concurrent loaders lock
+            # HospitalSpecificDetails rows in the same order
+            hospital_specific_details_values.sort(key=lambda row: row[0])
+            with loader_utils.batch_transaction(conn):
+                cur.executemany(
+                    queries.HOSPITAL_SPECIFIC_DETAILS_INSERT_QUERY,
+                    hospital_specific_details_values)
+            print("Successfully inserted batch with "
+                  f"{len(batch_df)} rows into "
+                  "HospitalSpecificDetails table")
+            logging.info("Successfully inserted batch with "
+                         f"{len(batch_df)} rows into "
+                         "HospitalSpecificDetails table")
+            inserted = insert_batch(batch_df, hospital_logistics_values)
+            logging.info("Successfully inserted batch with "
+                         f"{len(batch_df)} rows into "
+                         "HospitalLogistics table")
+        metrics.record_batch('HospitalLogistics', len(batch_df), inserted,
+                             time.perf_counter() - start_time, fk_fallback)
+
+
+async def load_batch_async(conn, batch_df, mode, metrics):
+    """
+    Insert one batch into HospitalLogistics on an asynchronous connection,
+    in its own transaction like each batch of load_chunk(), with the same
+    foreign key violation fallback.
+
+    In executemany mode the statements of the batch, from BEGIN to COMMIT,
+    are sent in one pipeline that syncs once. COPY cannot run in a
+    pipeline, so copy mode does not use one.
+    """
+    insert_logistics = ASYNC_INSERT_MODES[mode]
+    with metrics.stage('tuple_building'):
+        hospital_logistics_values = loader_utils.row_tuples(
+            batch_df, HOSPITAL_LOGISTICS_COLUMNS)
+    params = reporting_status_params(batch_df)
+
+    async def insert_batch():
+        async with conn.cursor() as cur:
+            async with async_loader.batch_transaction(
+                    conn, mode == 'executemany'):
+                await insert_logistics(cur, hospital_logistics_values)
+                if params:
+                    await conn.execute(
+                        queries.HOSPITAL_REPORTING_STATUS_UPDATE_QUERY,
+                        params)
+            # in pipeline mode the row count is complete once it has synced
+            return cur.rowcount
+
+    start_time = time.perf_counter()
+    fk_fallback = False
+    try:
+        inserted = await insert_batch()
+    except errors.ForeignKeyViolation:
+        fk_fallback = True
+        logging.warning("Foreign key violation encountered.")
+        logging.info("Inserting into HospitalSpecificDetails.")
+        hospital_specific_details_values = loader_utils.row_tuples(
+            batch_df, HOSPITAL_SPECIFIC_DETAILS_COLUMNS)
+        hospital_specific_details_values.sort(key=lambda row: row[0])
+        async with async_loader.batch_transaction(conn):
+            async with conn.cursor() as cur:
+                await cur.executemany(
+                    queries.HOSPITAL_SPECIFIC_DETAILS_INSERT_QUERY,
+                    hospital_specific_details_values)
+        inserted = await insert_batch()
+    logging.info(f"Successfully inserted batch with {len(batch_df)} rows "
+                 "into HospitalLogistics table")
+    metrics.record_batch('HospitalLogistics', len(batch_df), inserted,
+                         time.perf_counter() - start_time, fk_fallback)
+
+
+def drop_loaded_rows(conn, data, loaded_keys):
+    """
+    Drop the rows of a chunk whose (hospital_pk, collection_week) key is
+    already in HospitalLogistics, so re-runs only send missing rows.
+
+    loaded_keys maps every collection week seen so far to the set of
+    hospital_pk values loaded for it. It is filled with one query for the
+    weeks of a chunk that have not been seen yet.
+    """
+    new_weeks = set(data['collection_week'].dropna()) - loaded_keys.keys()
+    if new_weeks:
+        for week in new_weeks:
+            loaded_keys[week] = set()
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute(queries.HOSPITAL_LOGISTICS_LOADED_KEYS_QUERY,
+                            {'weeks': sorted(new_weeks)})
+                for hospital_pk, week in cur:
+                    loaded_keys[week].add(hospital_pk)
+
+    already_loaded = [
+        hospital_pk in loaded_keys.get(week, ())
+        for hospital_pk, week in zip(data['hospital_pk'],
+                                     data['collection_week'])
+    ]
+    return data[~pd.Series(already_loaded, index=data.index, dtype=bool)]
+
+
+def load_file(conn, csv_file, mode='executemany', chunksize=None,
+              pipeline=False, force=False, cache=True,
+              metrics_file=METRICS_FILE, prometheus_file=None,
+              concurrency=None, connect_async=async_loader.connect):
+    """
+    Load one HHS CSV file into HospitalLogistics.
+
+    Parameters:
+    - conn (psycopg.Connection): Database connection in autocommit mode.
+    - csv_file (str): Path to the HHS CSV file.
+    - mode (str): One of INSERT_MODES, how rows are sent to the database.
+    - chunksize (int): Stream the file this many rows at a time, or read it
+        all at once when None.
+    - pipeline (bool): Load chunks on a background writer thread while the
+        next chunk is cleaned.
+    - force (bool): Load the file even if LoadHistory shows a file with the
+        same content was already loaded.
+    - cache (bool): Read the cleaned file from the Parquet cache in
+        clean_cache.CACHE_DIR when it is there, and write it there when not.
+    - metrics_file (str): JSON lines file the per-batch and per-run metrics
+        are appended to, or None to not write them.
+    - prometheus_file (str): Prometheus textfile to write the run metrics
+        to, or None.
+    - concurrency (int): Insert batches on this many asynchronous
+        connections at once with async_loader, or on conn when None.
+    - connect_async (coroutine function): Opens the asynchronous
+        connections, see async_loader.run_batches().
+
+    Returns:
+    - int: The number of processed rows in the file, or 0 if it was skipped.
+    """
+    content_hash = loader_utils.file_hash(csv_file)
+    if not force and \
+            loader_utils.is_loaded(conn, content_hash, 'HospitalLogistics'):
+        print(f"Skipping {csv_file}: already loaded")
+        logging.info(f"Skipping {csv_file}: a file with the same content "
+                     "was already loaded")
+        return 0
+
+    insert_logistics = INSERT_MODES[mode]
+    metrics = load_metrics.LoadMetrics('hhs', csv_file)
+
+    def read_chunks():
+        if chunksize:
+            # chunks are read and preprocessed lazily while loading
+            return iter_chunks(csv_file, chunksize, metrics)
+        return [load_data(csv_file, metrics)]
+
+    if cache:
+        chunks = clean_cache.cached_chunks(
+            'hhs', content_hash, clean_cache.code_version(__file__),
+            read_chunks, LOADED_COLUMNS)
+    else:
+        chunks = read_chunks()
+    # also applied to cached chunks, which may predate the check
+    chunks = (drop_missing_weeks(data, metrics) for data in chunks)
+
+    with conn.cursor() as cur:
+        if mode == 'copy':
+            cur.execute(queries.HOSPITAL_LOGISTICS_STAGING_CREATE_QUERY)
+
+        start_time = time.perf_counter()
+        progress = {'chunks': 0, 'rows': 0, 'sent': 0}
+        known_pks = loader_utils.fetch_known_hospital_pks(conn)
+        initially_known = len(known_pks)
+        file_pks = set()
+        file_weeks = set()
+        partition_years = set()
+        loaded_keys = {}
+
+        def prepare_chunk(data):
+            file_pks.update(data['hospital_pk'])
+            file_weeks.update(data['collection_week'].dropna())
+            with metrics.stage('key_diff'):
+                new_rows = drop_loaded_rows(conn, data, loaded_keys)
+            weeks = set(new_rows['collection_week'].dropna())
+            with metrics.stage('partitions'):
+                loader_utils.ensure_logistics_partitions(
+                    conn, {week.year for week in weeks}, partition_years)
+            return new_rows
+
+        def count_chunk(data, new_rows):
+            metrics.count('rows_processed', len(data))
+            metrics.count('rows_already_loaded', len(data) - len(new_rows))
+            progress['chunks'] += 1
+            progress['rows'] += len(data)
+            progress['sent'] += len(new_rows)
+            if chunksize:
+                elapsed = time.perf_counter() - start_time
+                logging.info(f"Chunk {progress['chunks']}: loaded "
+                             f"{len(new_rows)} of {len(data)} rows, "
+                             f"{progress['rows']} rows in total after "
+                             f"{elapsed:.2f}s")
+
+        def write_chunk(data):
+            new_rows = prepare_chunk(data)
+            load_chunk(conn, cur, new_rows, insert_logistics, known_pks,
+                       metrics)
+            count_chunk(data, new_rows)
+
+        def chunk_batches():
+            # new hospitals are inserted once per chunk, before its batches
+            # are handed to the asynchronous connections
+            for data in chunks:
+                new_rows = prepare_chunk(data)
+                with metrics.stage('hospital_insert'):
+                    insert_new_hospitals(conn, cur, new_rows, known_pks)
+                for row_index in range(0, len(new_rows), BATCH_SIZE):
+                    yield new_rows[row_index:row_index + BATCH_SIZE]
+                count_chunk(data, new_rows)
+
+        async def write_batch(async_conn, batch_df):
+            await load_batch_async(async_conn, batch_df, mode, metrics)
+
+        async def create_staging_table(async_conn):
+            await async_conn.execute(
+                queries.HOSPITAL_LOGISTICS_STAGING_CREATE_QUERY)
+
+        if concurrency:
+            async_loader.run(
+                chunk_batches(), write_batch, concurrency, connect_async,
+                create_staging_table if mode == 'copy' else None)
+        elif pipeline:
+            loader_utils.run_pipelined(chunks, write_chunk)
+        else:
+            for data in chunks:
+                write_chunk(data)
+
+    # every week of the file, not only those with new rows: a rerun after a
+    # load that failed before this point finds all its rows already loaded
+    with metrics.stage('summary_refresh'):
+        loader_utils.refresh_weekly_summaries(conn, file_weeks)
+    with metrics.stage('delta_refresh'):
+        loader_utils.refresh_covid_deltas(conn, file_weeks)
+
+    new_hospitals = len(known_pks) - initially_known
+    logging.info(f"{csv_file}: {new_hospitals} new and "
+                 f"{len(file_pks) - new_hospitals} known hospitals")
+
+    elapsed = time.perf_counter() - start_time
+    total_rows = progress['rows']
+    rows_per_sec = total_rows / elapsed if elapsed > 0 else 0.0
+    engine = f"{mode} mode"
+    if concurrency:
+        engine += f" on {concurrency} asynchronous connections"
+    summary = (f"Loaded {total_rows} rows from {csv_file} into "
+               f"HospitalLogistics in {elapsed:.2f}s "
+               f"({rows_per_sec:.0f} rows/sec) using {engine}, "
+               f"{total_rows - progress['sent']} rows were already loaded")
+    print(summary)
+    logging.info(summary)
+    loader_utils.record_load(conn, csv_file, 'HospitalLogistics', total_rows,
+                             content_hash, min(file_weeks, default=None),
+                             max(file_weeks, default=None))
+    if metrics_file:
+        metrics.write_json_lines(metrics_file)
+    if prometheus_file:
+        metrics.write_prometheus(prometheus_file)
+    return total_rows
+
+
 def main():
     if len(sys.argv) < 2:
         logging.error("Please provide the CSV file path as an argument.")
         print("Please provide the CSV file path as an argument.")
         sys.exit(1)
 
-    csv_file = sys.argv[1]
+    args = parse_args(sys.argv[1:])
     try:
-        data = load_data(csv_file)
-        data = data.astype(str)
-        data = data.applymap(lambda x: None if x == 'nan' else x)
+        with loader_utils.connect(autocommit=True) as conn:
+            load_file(conn, args.csv_file, args.mode, args.chunksize,
+                      args.pipeline, args.force, args.cache,
+                      args.metrics_file, args.prometheus_file,
+                      args.concurrency if args.use_async else None)
+    except psycopg.OperationalError as e:
+        logging.error(f"Database connection error: {e}")
     except Exception as e:
         logging.error(f"Error processing the data: {e}")
         sys.exit(1)
-
-    try:
-        with psycopg.connect(
-            host="pinniped.postgres.database.azure.com",
-            dbname=credentials.DB_USER,
-            user=credentials.DB_USER,
-            password=credentials.DB_PASSWORD,
-            autocommit=True
-        ) as conn:
-            with conn.cursor() as cur:
-
-                for row_index in range(0, len(data), BATCH_SIZE):
-                    batch_df = data[row_index:row_index + BATCH_SIZE]
-                    logging.info(f"Running process for batch "
-                                 f"{(row_index // BATCH_SIZE) + 1}")
-                    hospital_logistics_columns = [
-                        'hospital_pk',
-                        'collection_week',
-                        'all_adult_hospital_beds_7_day_avg',
-                        'all_pediatric_inpatient_beds_7_day_avg',
-                        'all_adult_hospital_inpatient_bed_occupied_7_day_avg',
-                        'all_pediatric_inpatient_bed_occupied_7_day_avg',
-                        'total_icu_beds_7_day_avg',
-                        'icu_beds_used_7_day_avg',
-                        'inpatient_beds_used_covid_7_day_avg',
-                        'staffed_icu_adult_patients_confirmed_covid_7_day_avg'
-                    ]
-
-                    hospital_logistics_values = [
-                        tuple(row[col] for col in hospital_logistics_columns)
-                        for _, row in batch_df.iterrows()
-                    ]
-
-                    try:
-                        with conn.transaction():
-                            cur.executemany(
-                                queries.HOSPITAL_LOGISTICS_INSERT_QUERY,
-                                hospital_logistics_values)
-                            logging.info("Successfully inserted batch with "
-                                         f"{len(batch_df)} "
-                                         "rows into HospitalLogistics table")
-                    except errors.ForeignKeyViolation:
-                        logging.warning("Foreign key violation encountered.")
-                        logging.info("Inserting into HospitalSpecificDetails.")
-                        hospital_specific_details_values = [
-                            (row['hospital_pk'], row['state'],
-                             row['hospital_name'], row['address'],
-                             row['city'], row['zip'], row['fips_code'],
-                             row['longitude'], row['latitude'])
-                            for _, row in batch_df.iterrows()
-                        ]
-
-                        with conn.transaction():
-                            cur.executemany(
-                                queries.HOSPITAL_SPECIFIC_DETAILS_INSERT_QUERY,
-                                hospital_specific_details_values)
-                            print("Successfully inserted batch with "
-                                  f"{len(batch_df)} rows into "
-                                  "HospitalSpecificDetails table")
-                            logging.info("Successfully inserted batch with "
-                                         f"{len(batch_df)} rows into "
-                                         "HospitalSpecificDetails table")
-                        with conn.transaction():
-                            cur.executemany(
-                                queries.HOSPITAL_LOGISTICS_INSERT_QUERY,
-                                hospital_logistics_values)
-                            logging.info("Successfully inserted batch with "
-                                         f"{len(batch_df)} rows into "
-                                         "HospitalLogistics table")
-
-    except psycopg.OperationalError as e:
-        logging.error(f"Database connection error: {e}")
     finally:
-        cur.close()
-        logging.info("Cursor closed.")
-        conn.close()
         logging.info("Database connection closed.")
 
 
@@ -1,13 +1,57 @@
-import psycopg
+import argparse
 import pandas as pd
 import sys
-import credentials
+import time
 from datetime import datetime
 from psycopg import errors
 import queries
 import helper_functions as hf
+import loader_utils
+import async_loader
+import clean_cache
+import load_metrics
 import logging
 
+# read Facility ID as text so that numeric-looking keys keep their leading
+# zeros and are not shortened into other valid-looking keys
+CSV_DTYPES = {'Facility ID': str}
+
+# columns read back from the cache of cleaned data
+LOADED_COLUMNS = [
+    'hospital_pk',
+    'last_updated',
+    'hospital_overall_rating',
+    'hospital_ownership',
+    'emergency_services',
+    'hospital_name',
+    'address',
+    'city',
+    'zip',
+    'state'
+]
+
+# columns inserted into HospitalQualityDetails
+QUALITY_DATA_COLUMNS = [
+    'hospital_pk',
+    'last_updated',
+    'hospital_overall_rating',
+    'hospital_ownership',
+    'emergency_services'
+]
+
+# columns inserted into HospitalSpecificDetails and its staging table
+STATIC_DATA_COLUMNS = [
+    'hospital_pk',
+    'hospital_name',
+    'address',
+    'city',
+    'zip',
+    'state'
+]
+
+# per-batch and per-run metrics are appended to this JSON lines file
+METRICS_FILE = 'cms_load_metrics.jsonl'
+
 # Set up logging
 logging.basicConfig(
     filename='cms_data_loading.log',
@@ -16,70 +60,117 @@ logging.basicConfig(
 )
 
 
-def check_and_update_static_data(conn, data, columns):
+def stage_static_data(conn, data, columns):
     """
-    Checks for discrepancies between HospitalsQualityDetails and
-    HospitalSpecificDetails and updates them.
+    Copies the static hospital columns of a processed CMS chunk into the
+    CmsStaticDetailsStaging temporary table.
 
     Parameters:
     conn (psycopg.Connection): Database connection object.
-    data (pd.DataFrame): Processed CMS hospital data to be compared.
-    columns (list): List of column to be compared and updated.
+    data (pd.DataFrame): Processed CMS hospital data.
+    columns (list): Static columns, in the order of
+        STATIC_DETAILS_STAGING_COPY_QUERY.
+    """
+    with conn.transaction():
+        with conn.cursor() as cur:
+            with cur.copy(queries.STATIC_DETAILS_STAGING_COPY_QUERY) as copy:
+                for row in loader_utils.row_tuples(data, columns):
+                    copy.write_row(row)
 
-    Notes:
-    - The function performs the following tasks:
-      - Reads existing data from the `HospitalSpecificDetails` table based on
-        the `hospital_pk` values in the batch.
-      - Identifies discrepancies between the batch data and
-        `HospitalSpecificDetails` by performing a join and mismatched columns.
-      - Constructs a DataFrame of discrepancies (discrepancies_df) with
-        records that do not match the existing data in HospitalSpecificDetails
-      - Executes an update query to modify mismatched rows in
-        `HospitalSpecificDetails` based on `hospital_pk`.
+
+def reconcile_static_data(conn):
     """
+    Updates the HospitalSpecificDetails rows whose static details differ
+    from the staged CMS data, using a single set-based UPDATE. The weekly
+    rollups of hospitals whose state changed are recomputed in the same
+    transaction, so the dashboard never sees one without the other.
 
-    cur = conn.cursor()
+    Parameters:
+    conn (psycopg.Connection): Database connection object.
 
-    data = data.copy()
-    # read HospitalSpecificDetails for hospital_pk in qualtiy data batch
+    Returns:
+    int: The number of HospitalSpecificDetails rows that were changed.
+    """
     with conn.transaction():
-        # Execute the query with the hospital_pks tuple as a parameter
-        hospital_pks = list(data['hospital_pk'])
-        placeholders = ','.join(['%s'] * len(hospital_pks))
-        static_data_check_query = f"""
-            SELECT hospital_pk, hospital_name, address, city, zip, state
-            FROM HospitalSpecificDetails
-            WHERE hospital_pk IN ({placeholders})
-        """
-        cur.execute(static_data_check_query, (tuple(hospital_pks)))
-
-        static_data = cur.fetchall()
-        h_df = pd.DataFrame(static_data, columns=columns)
-
-        # join h_df with the batch data, and see which rows are not in h_df
-        data = data[columns]
-        data = data[data['hospital_pk'].isin(list(h_df['hospital_pk']))]
-        h_df = h_df.merge(data, on=columns, how="right", indicator=True)
-        # if the static values does not match, indicator will be 'right_only'
-
-        discrepencies_df = h_df[h_df['_merge'] == 'right_only'].\
-            drop(columns=['_merge'])
-        # fix the order of columns to be inline with update query
-        col_order = [x for x in columns if x not in ['hospital_pk']] \
-            + ['hospital_pk']
-
-        # Before inserting values into HospitalQualityDetails, update
-        # the values for these discrepencies
-        update_values = [
-            (tuple(row[col] for col in col_order))
-            for idx, row in discrepencies_df.iterrows()
-        ]
-        cur.executemany(queries.STATIC_DETAILS_UPDATE_QUERY, update_values)
-        logging.info("Updation Successful for HospitalSpecificData")
-    cur.close()
+        with conn.cursor() as cur:
+            cur.execute(queries.STATIC_DETAILS_RECONCILE_QUERY)
+            changed = cur.fetchall()
+        moved = [pk for pk, state_changed in changed if state_changed]
+        refresh_moved_hospitals(conn, moved)
+    logging.info(f"Updated {len(changed)} rows of HospitalSpecificDetails, "
+                 f"{len(moved)} of them changed state")
+    return len(changed)
 
 
-def batch_insert_cms_data(conn, data, batch_size=100):
+def refresh_moved_hospitals(conn, hospital_pks):
+    """
+    Recomputes the weekly per-state rollups and COVID deltas of every week
+    reported by hospitals whose state changed.
+
+    Parameters:
+    conn (psycopg.Connection): Database connection object.
+    hospital_pks (list): Hospitals whose state changed.
+    """
+    if not hospital_pks:
+        return
+    weeks = [week for week, in conn.execute(
+        queries.HOSPITAL_LOGISTICS_HOSPITAL_WEEKS_QUERY,
+        {'hospital_pks': hospital_pks})]
+    loader_utils.refresh_weekly_summaries(conn, weeks)
+    loader_utils.refresh_covid_deltas(conn, weeks)
+
+
+def refresh_rating_periods(conn, last_updated):
+    """
+    Rebuilds the HospitalQualityRatingPeriods rows of every hospital that
+    has a quality snapshot updated on last_updated. Those hospitals are
+    locked first, so loads running at the same time rebuild them one after
+    the other.
+
+    Parameters:
+    conn (psycopg.Connection): Database connection object.
+    last_updated (datetime.date): Date of the quality data just loaded.
+    """
+    params = {'last_updated': last_updated}
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute(queries.HOSPITAL_QUALITY_RATING_PERIODS_LOCK_QUERY,
+                        params)
+            cur.execute(queries.HOSPITAL_QUALITY_RATING_PERIODS_DELETE_QUERY,
+                        params)
+            cur.execute(queries.HOSPITAL_QUALITY_RATING_PERIODS_INSERT_QUERY,
+                        params)
+            rebuilt = cur.rowcount
+    logging.info(f"Rebuilt {rebuilt} quality rating periods")
+
+
+def insert_new_hospitals(conn, data, columns, known_pks):
+    """
+    Inserts the hospitals of a batch that are not in known_pks into
+    HospitalSpecificDetails, and adds them to known_pks.
+
+    Parameters:
+    conn (psycopg.Connection): Database connection object.
+    data (pd.DataFrame): Processed CMS hospital data batch.
+    columns (list): Columns inserted by STATIC_DETAILS_INSERT_QUERY.
+    known_pks (set): hospital_pk values already in HospitalSpecificDetails.
+    """
+    new_hospitals = loader_utils.select_new_hospitals(data, known_pks)
+    if new_hospitals.empty:
+        return
+
+    static_values = loader_utils.row_tuples(new_hospitals, columns)
+    with loader_utils.batch_transaction(conn):
+        with conn.cursor() as cur:
+            cur.executemany(queries.STATIC_DETAILS_INSERT_QUERY,
+                            static_values)
+    known_pks.update(new_hospitals['hospital_pk'])
+    logging.info(f"Inserted {len(new_hospitals)} new hospitals into "
+                 "HospitalSpecificDetails")
+
+
+def batch_insert_cms_data(conn, data, batch_size=100, known_pks=None,
+                          metrics=None):
     """
     Inserts CMS hospital quality data into two database tables in batches,
     with handling for foreign key violations.
@@ -88,37 +179,37 @@ def batch_insert_cms_data(conn, data, batch_size=100):
     conn (psycopg.Connection): Database connection object.
     data (pd.DataFrame): Processed CMS hospital data to be inserted.
     batch_size (int): Number of records to process per batch. Default is 100.
+    known_pks (set): hospital_pk values already in HospitalSpecificDetails.
+        When given, hospitals missing from it are inserted before each batch
+        and added to the set, so the ForeignKeyViolation path is only a
+        fallback.
+    metrics (load_metrics.LoadMetrics): Collects the time and row counts
+        of every batch.
 
     Notes:
     - The function performs the following transformations:
       - Defines SQL insertion queries for insertion.
-      - If any hospital details in the quality data differ from those stored in
-        HospitalSpecificDetails, the function updates them
       - Inserts rows in 'HospitalQualityDetails' table in batches.
       - Handles ForeignKeyViolation error by first inserting into
         'HospitalSpecificDetails' if required, and then retries insertion into
         'HospitalQualityDetails'.
       - Uses 'ON CONFLICT DO NOTHING' to prevent duplicate entries on conflict.
+      - Sends each batch transaction in one pipeline that syncs once, so its
+        statements do not wait for each other's results. This needs an
+        autocommit connection.
     """
 
+    metrics = metrics or load_metrics.LoadMetrics('cms')
     cur = conn.cursor()
 
-    quality_data_cols = [
-        'hospital_pk',
-        'last_updated',
-        'hospital_overall_rating',
-        'hospital_ownership',
-        'emergency_services'
-    ]
-
-    static_data_cols = [
-        'hospital_pk',
-        'hospital_name',
-        'address',
-        'city',
-        'zip',
-        'state'
-    ]
+    def insert_batch(quality_values):
+        # each batch transaction is sent in one pipeline; its errors are
+        # raised at the latest when the block exits
+        with loader_utils.batch_transaction(conn):
+            cur.executemany(queries.HOSPITAL_QUALTIY_DETAILS_INSERT_QUERY,
+                            quality_values)
+        # in pipeline mode the row count is complete once it has synced
+        return cur.rowcount
 
     # insert rows in HospitalQualityDetails in batches
     for row_index in range(0, len(data), batch_size):
@@ -128,83 +219,315 @@ def batch_insert_cms_data(conn, data, batch_size=100):
         logging.info("Number of rows in batch "
                      f"{(row_index // batch_size) + 1}: {len(batch_df)}")
 
-        # Check if hospital-specific column in quality data matches
-        # HospitalSpecificDetails, update if not
-        check_and_update_static_data(conn, batch_df, static_data_cols)
-
         # Prepare values for insertion in HospitalQualityDetails
-        quality_values = [
-            (tuple(row[col] for col in quality_data_cols))
-            for idx, row in batch_df.iterrows()
-        ]
+        with metrics.stage('tuple_building'):
+            quality_values = loader_utils.row_tuples(
+                batch_df, QUALITY_DATA_COLUMNS)
 
+        start_time = time.perf_counter()
+        fk_fallback = False
         try:
-            with conn.transaction():
-                cur.executemany(queries.HOSPITAL_QUALTIY_DETAILS_INSERT_QUERY,
-                                quality_values)
-                logging.info("Insertion successful for HospitalQualityDetails")
+            if known_pks is not None:
+                with metrics.stage('hospital_insert'):
+                    insert_new_hospitals(conn, batch_df, STATIC_DATA_COLUMNS,
+                                         known_pks)
+                start_time = time.perf_counter()
+            inserted = insert_batch(quality_values)
+            logging.info("Insertion successful for HospitalQualityDetails")
         except errors.ForeignKeyViolation:
+            fk_fallback = True
             # Handle foreign key violation by inserting
             # into HospitalSpecificDetails first
             logging.warning("Foreign key violation encountered")
             logging.info("Inserting into HospitalSpecificDetails.")
 
             # Prepare values for insertion into HospitalSpecificDetails
-            static_values = [
-                (tuple(row[col] for col in static_data_cols))
-                for idx, row in batch_df.iterrows()
-            ]
-
-            # Insert into HospitalSpecificDetails to resolve FK dependency
-            with conn.transaction():
+            static_values = loader_utils.row_tuples(
+                batch_df, STATIC_DATA_COLUMNS)
+
+            # Insert into HospitalSpecificDetails to resolve FK dependency,
+            # in primary key order so that concurrent loaders lock rows in
+            # the same order
+            static_values.sort(key=lambda row: row[0])
+            with loader_utils.batch_transaction(conn):
                 cur.executemany(queries.STATIC_DETAILS_INSERT_QUERY,
                                 static_values)
-                logging.info("Insertion successful "
-                             "for HospitalSpecificDetails")
+            logging.info("Insertion successful for HospitalSpecificDetails")
 
             # Reinserting into HospitalQualityDetails after resolving FK error
-            with conn.transaction():
-                cur.executemany(queries.HOSPITAL_QUALTIY_DETAILS_INSERT_QUERY,
-                                quality_values)
-                logging.info("Insertion successful for HospitalQualityDetails")
+            inserted = insert_batch(quality_values)
+            logging.info("Insertion successful for HospitalQualityDetails")
 
         except Exception as e:
             logging.error(f"Error in batch {(row_index // batch_size) + 1}: "
                           f"{e}")
+            metrics.count('rows_failed', len(batch_df))
+            continue
+
+        metrics.record_batch('HospitalQualityDetails', len(batch_df),
+                             inserted, time.perf_counter() - start_time,
+                             fk_fallback)
 
     cur.close()
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
+async def insert_cms_batch_async(conn, batch_df, metrics):
+    """
+    Inserts one batch of CMS quality data on an asynchronous connection, in
+    its own transaction like each batch of batch_insert_cms_data(), with
+    the same handling of foreign key violations and failed batches.
+
+    Parameters:
+    conn (psycopg.AsyncConnection): Asynchronous database connection.
+    batch_df (pd.DataFrame): Processed CMS hospital data batch, whose new
+        hospitals were already inserted into HospitalSpecificDetails.
+    metrics (load_metrics.LoadMetrics): Collects the time and row counts
+        of the batch.
+    """
+    with metrics.stage('tuple_building'):
+        quality_values = loader_utils.row_tuples(batch_df,
+                                                 QUALITY_DATA_COLUMNS)
+
+    async def insert_batch():
+        async with conn.cursor() as cur:
+            async with async_loader.batch_transaction(conn):
+                await cur.executemany(
+                    queries.HOSPITAL_QUALTIY_DETAILS_INSERT_QUERY,
+                    quality_values)
+            # in pipeline mode the row count is complete once it has synced
+            return cur.rowcount
+
+    start_time = time.perf_counter()
+    fk_fallback = False
+    try:
+        try:
+            inserted = await insert_batch()
+        except errors.ForeignKeyViolation:
+            fk_fallback = True
+            logging.warning("Foreign key violation encountered")
+            logging.info("Inserting into HospitalSpecificDetails.")
+            static_values = loader_utils.row_tuples(batch_df,
+                                                    STATIC_DATA_COLUMNS)
+            static_values.sort(key=lambda row: row[0])
+            async with async_loader.batch_transaction(conn):
+                async with conn.cursor() as cur:
+                    await cur.executemany(queries.STATIC_DETAILS_INSERT_QUERY,
+                                          static_values)
+            inserted = await insert_batch()
+    except Exception as e:
+        logging.error(f"Error in batch of {len(batch_df)} rows: {e}")
+        metrics.count('rows_failed', len(batch_df))
+        return
+    logging.info("Insertion successful for HospitalQualityDetails")
+    metrics.record_batch('HospitalQualityDetails', len(batch_df), inserted,
+                         time.perf_counter() - start_time, fk_fallback)
+
+
+def iter_chunks(file_path, last_updated, chunksize=None, metrics=None):
+    """
+    Read and preprocess the CMS CSV file, yielding it chunksize rows at a
+    time, or as a single chunk when chunksize is None.
+    """
+    metrics = metrics or load_metrics.LoadMetrics('cms', file_path)
+    if chunksize:
+        reader = pd.read_csv(file_path, dtype=CSV_DTYPES,
+                             chunksize=chunksize)
+    else:
+        # a generator, so that reading the whole file is timed below
+        reader = (pd.read_csv(file_path, dtype=CSV_DTYPES)
+                  for _ in range(1))
+    for chunk_number, data in enumerate(
+            metrics.timed_iter('csv_read', reader), start=1):
+        logging.info(f"Chunk {chunk_number} has {len(data)} rows in total")
+        data['last_updated'] = last_updated
+        with metrics.stage('cleaning'):
+            processed_data = hf.process_cms_data(data)
+        metrics.count('rows_read', len(data))
+        metrics.count('rows_rejected_by_cleaning',
+                      len(data) - len(processed_data))
+        yield processed_data
+
+
+def parse_args(argv):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Load CMS quality data into HospitalQualityDetails.")
+    parser.add_argument("last_updated",
+                        type=lambda x: datetime.strptime(x, "%Y-%m-%d").date(),
+                        help="date the quality data was updated (YYYY-MM-DD)")
+    parser.add_argument("file_path", help="path to the CMS CSV file")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="read the CSV file this many rows at a time")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="clean the next chunk while a background "
+                             "thread loads the current one "
+                             "(requires --chunksize)")
+    parser.add_argument("--force", action="store_true",
+                        help="load the file even if the same content was "
+                             "already loaded")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="always parse and clean the CSV file instead "
+                             "of using the cache of cleaned data")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="insert batches on several asynchronous "
+                             "connections at once")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="connections used by --async")
+    parser.add_argument("--metrics-file", default=METRICS_FILE,
+                        help="JSON lines file to append stage metrics to")
+    parser.add_argument("--prometheus-file", default=None,
+                        help="also write the run metrics to this "
+                             "Prometheus textfile")
+    args = parser.parse_args(argv)
+    if args.pipeline and not args.chunksize:
+        parser.error("--pipeline requires --chunksize")
+    if args.pipeline and args.use_async:
+        parser.error("--pipeline cannot be combined with --async, which "
+                     "already cleans chunks while batches are inserted")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    return args
+
+
+def load_file(conn, file_path, last_updated, chunksize=None,
+              pipeline=False, batch_size=100, force=False, cache=True,
+              metrics_file=METRICS_FILE, prometheus_file=None,
+              concurrency=None, connect_async=async_loader.connect):
+    """
+    Load one CMS CSV file into HospitalQualityDetails.
+
+    Parameters:
+    conn (psycopg.Connection): Database connection in autocommit mode, so
+        that batch transactions are pipelined.
+    file_path (str): Path to the CMS CSV file.
+    last_updated (datetime.date): Date the quality data was updated.
+    chunksize (int): Read the file this many rows at a time, or all at once
+        when None.
+    pipeline (bool): Load chunks on a background writer thread while the
+        next chunk is cleaned.
+    batch_size (int): Number of records to process per batch.
+    force (bool): Load the file even if LoadHistory shows a file with the
+        same content was already loaded.
+    cache (bool): Read the cleaned file from the Parquet cache in
+        clean_cache.CACHE_DIR when it is there, and write it there when not.
+    metrics_file (str): JSON lines file the per-batch and per-run metrics
+        are appended to, or None to not write them.
+    prometheus_file (str): Prometheus textfile to write the run metrics
+        to, or None.
+    concurrency (int): Insert batches on this many asynchronous connections
+        at once with async_loader, or on conn when None.
+    connect_async (coroutine function): Opens the asynchronous connections,
+        see async_loader.run_batches().
+
+    Returns:
+    int: The number of processed rows sent to the database, or 0 if the
+        file was skipped.
+    """
+    content_hash = loader_utils.file_hash(file_path)
+    if not force and loader_utils.is_loaded(conn, content_hash,
+                                            'HospitalQualityDetails'):
+        print(f"Skipping {file_path}: already loaded")
+        logging.info(f"Skipping {file_path}: a file with the same content "
+                     "was already loaded")
+        return 0
+
+    metrics = load_metrics.LoadMetrics('cms', file_path)
+    if cache:
+        # last_updated is stored in every cleaned row, so it is part of the key
+        chunks = clean_cache.cached_chunks(
+            f"cms-{last_updated:%Y-%m-%d}", content_hash,
+            clean_cache.code_version(__file__),
+            lambda: iter_chunks(file_path, last_updated, chunksize, metrics),
+            LOADED_COLUMNS)
+    else:
+        chunks = iter_chunks(file_path, last_updated, chunksize, metrics)
+
+    progress = {'rows': 0}
+    with conn.transaction():
+        conn.execute(queries.STATIC_DETAILS_STAGING_CREATE_QUERY)
+    known_pks = loader_utils.fetch_known_hospital_pks(conn)
+    initially_known = len(known_pks)
+    file_pks = set()
+
+    def write_chunk(processed_data):
+        file_pks.update(processed_data['hospital_pk'])
+        with metrics.stage('static_staging'):
+            stage_static_data(conn, processed_data, STATIC_DATA_COLUMNS)
+        batch_insert_cms_data(conn, processed_data, batch_size, known_pks,
+                              metrics)
+        metrics.count('rows_processed', len(processed_data))
+        progress['rows'] += len(processed_data)
+
+    def chunk_batches():
+        # static details are staged and new hospitals inserted once per
+        # chunk, before its batches are handed to the asynchronous
+        # connections
+        for processed_data in chunks:
+            file_pks.update(processed_data['hospital_pk'])
+            with metrics.stage('static_staging'):
+                stage_static_data(conn, processed_data, STATIC_DATA_COLUMNS)
+            with metrics.stage('hospital_insert'):
+                insert_new_hospitals(conn, processed_data,
+                                     STATIC_DATA_COLUMNS, known_pks)
+            for row_index in range(0, len(processed_data), batch_size):
+                yield processed_data[row_index:row_index + batch_size]
+            metrics.count('rows_processed', len(processed_data))
+            progress['rows'] += len(processed_data)
+
+    async def write_batch(async_conn, batch_df):
+        await insert_cms_batch_async(async_conn, batch_df, metrics)
+
+    if concurrency:
+        async_loader.run(chunk_batches(), write_batch, concurrency,
+                         connect_async)
+    elif pipeline:
+        loader_utils.run_pipelined(chunks, write_chunk)
+    else:
+        for processed_data in chunks:
+            write_chunk(processed_data)
+
+    # If any hospital details in the quality data differ from those stored
+    # in HospitalSpecificDetails, update them
+    with metrics.stage('static_reconcile'):
+        reconcile_static_data(conn)
+    with metrics.stage('rating_periods'):
+        refresh_rating_periods(conn, last_updated)
+
+    new_hospitals = len(known_pks) - initially_known
+    logging.info(f"{file_path}: {new_hospitals} new and "
+                 f"{len(file_pks) - new_hospitals} known hospitals")
+    loader_utils.record_load(conn, file_path, 'HospitalQualityDetails',
+                             progress['rows'], content_hash, last_updated,
+                             last_updated)
+    if metrics_file:
+        metrics.write_json_lines(metrics_file)
+    if prometheus_file:
+        metrics.write_prometheus(prometheus_file)
+    return progress['rows']
+
+
+def main():
+    if len(sys.argv) < 3:
         logging.error("Usage: load-quality.py <last_updated> <file_path>")
         print("Usage: load-quality.py <last_updated> <file_path>")
         sys.exit(1)
 
     # Get file path and last_updated date from command-line arguments
-    file_path = sys.argv[2]
-    last_updated = datetime.strptime(sys.argv[1], "%Y-%m-%d").date()
+    args = parse_args(sys.argv[1:])
+
+    # autocommit, so that batch transactions can be pipelined; every other
+    # statement runs in a conn.transaction() block
+    conn = loader_utils.connect(autocommit=True)
+    try:
+        load_file(conn, args.file_path, args.last_updated, args.chunksize,
+                  args.pipeline, force=args.force, cache=args.cache,
+                  metrics_file=args.metrics_file,
+                  prometheus_file=args.prometheus_file,
+                  concurrency=args.concurrency if args.use_async else None)
+    finally:
+        conn.close()
+        logging.info("Database connection closed.")
 
-    data = pd.read_csv(file_path)
-    logging.info(f"Data has {len(data)} rows in total")
 
-    data['last_updated'] = last_updated
-
-    processed_data = hf.process_cms_data(data)
-    processed_data = processed_data.astype(str)
-    processed_data = processed_data\
-        .applymap(lambda x: None if x == 'nan' else x)
-
-    conn = psycopg.connect(
-        host="pinniped.postgres.database.azure.com",
-        dbname=credentials.DB_USER,
-        user=credentials.DB_USER,
-        password=credentials.DB_PASSWORD
-    )
-
-    batch_size = 100
-
-    batch_insert_cms_data(conn, processed_data, batch_size)
-
-    conn.close()
-    logging.info("Database connection closed.")
+if __name__ == "__main__":
+    main()
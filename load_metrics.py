@@ -0,0 +1,191 @@
+"""
+This module contains the per-stage metrics collected by load-hhs.py and
+load-quality.py during a run.
+
+Each run appends JSON lines to a metrics file: one 'batch' line per batch
+sent to the database and a final 'run' line with the time spent in every
+stage and the row counters. The same totals can also be written as a
+Prometheus textfile, for the node_exporter textfile collector, so that a
+drop in throughput can be alerted on.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Counters reported for every run, whether or not they were incremented
+COUNTERS = [
+    'rows_read',
+    'rows_rejected_by_cleaning',
+    'rows_processed',
+    'rows_already_loaded',
+    'rows_sent',
+    'rows_inserted',
+    'rows_skipped_on_conflict',
+    'rows_failed',
+    'batches',
+    'fk_fallbacks',
+]
+
+# returned by next() once an iterator passed to timed_iter is exhausted
+_EXHAUSTED = object()
+
+
+class LoadMetrics:
+    """
+    Thread-safe collector of stage timings and row counters for one run.
+
+    Parameters:
+    - loader (str): Name of the loader, e.g. 'hhs' or 'cms'.
+    - source_file (str): File being loaded.
+    """
+
+    def __init__(self, loader='loader', source_file=None):
+        self.loader = loader
+        self.source_file = source_file
+        self.started_at = datetime.now(timezone.utc)
+        self.stages = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.batches = []
+        self._start_time = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block and add it to the stage `name`."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start_time)
+
+    def add_time(self, name, seconds):
+        """Add seconds spent in the stage `name`."""
+        with self._lock:
+            stage = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            stage['seconds'] += seconds
+            stage['calls'] += 1
+
+    def timed_iter(self, name, iterable):
+        """Yield from iterable, timing every step as the stage `name`."""
+        iterator = iter(iterable)
+        while True:
+            start_time = time.perf_counter()
+            item = next(iterator, _EXHAUSTED)
+            if item is _EXHAUSTED:
+                return
+            self.add_time(name, time.perf_counter() - start_time)
+            yield item
+
+    def count(self, name, value=1):
+        """Increment the counter `name`."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_batch(self, table_name, rows, inserted, seconds,
+                     fk_fallback=False):
+        """
+        Record one batch sent to the database.
+
+        Parameters:
+        - table_name (str): Table the batch was inserted into.
+        - rows (int): Rows in the batch.
+        - inserted (int): Rows actually inserted; the rest were skipped by
+            ON CONFLICT DO NOTHING.
+        - seconds (float): Time taken by the insert, including any foreign
+            key fallback.
+        - fk_fallback (bool): Whether the foreign key fallback was needed.
+        """
+        with self._lock:
+            self.batches.append({
+                'event': 'batch',
+                'loader': self.loader,
+                'file': self.source_file,
+                'table': table_name,
+                'batch': len(self.batches) + 1,
+                'rows': rows,
+                'inserted': inserted,
+                'skipped_on_conflict': rows - inserted,
+                'fk_fallback': fk_fallback,
+                'seconds': round(seconds, 6),
+            })
+            self.counters['batches'] += 1
+            self.counters['rows_sent'] += rows
+            self.counters['rows_inserted'] += inserted
+            self.counters['rows_skipped_on_conflict'] += rows - inserted
+            self.counters['fk_fallbacks'] += fk_fallback
+        self.add_time('db_insert', seconds)
+
+    def summary(self):
+        """Return the totals of the run as a dict."""
+        elapsed = time.perf_counter() - self._start_time
+        with self._lock:
+            return {
+                'event': 'run',
+                'loader': self.loader,
+                'file': self.source_file,
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'seconds': round(elapsed, 6),
+                'rows_per_sec':
+                    round(self.counters['rows_processed'] / elapsed)
+                    if elapsed > 0 else None,
+                'stages': {name: {'seconds': round(s['seconds'], 6),
+                                  'calls': s['calls']}
+                           for name, s in self.stages.items()},
+                'counters': dict(self.counters),
+            }
+
+    def write_json_lines(self, path):
+        """Append the batch lines and the run summary to a JSON lines file."""
+        with open(path, 'a') as f:
+            for batch in self.batches:
+                f.write(json.dumps(batch) + '\n')
+            f.write(json.dumps(self.summary()) + '\n')
+
+    def write_prometheus(self, path):
+        """
+        Write the run totals as a Prometheus textfile. The file is replaced
+        atomically so the collector never reads a partial file.
+        """
+        summary = self.summary()
+        label = f'loader="{self.loader}"'
+        lines = [
+            '# HELP hospital_loader_stage_seconds Seconds spent in each '
+            'stage of the last run.',
+            '# TYPE hospital_loader_stage_seconds gauge',
+        ]
+        for name, stage in summary['stages'].items():
+            lines.append(f'hospital_loader_stage_seconds'
+                         f'{{{label},stage="{name}"}} {stage["seconds"]}')
+        lines += [
+            '# HELP hospital_loader_run_count Row, batch and foreign key '
+            'fallback counts of the last run.',
+            '# TYPE hospital_loader_run_count gauge',
+        ]
+        for name, value in summary['counters'].items():
+            lines.append(f'hospital_loader_run_count'
+                         f'{{{label},counter="{name}"}} {value}')
+        lines += [
+            '# HELP hospital_loader_rows_per_second Rows processed per second '
+            'in the last run.',
+            '# TYPE hospital_loader_rows_per_second gauge',
+            f'hospital_loader_rows_per_second{{{label}}} '
+            f'{summary["rows_per_sec"] or 0}',
+            '# HELP hospital_loader_duration_seconds Duration of the last '
+            'run.',
+            '# TYPE hospital_loader_duration_seconds gauge',
+            f'hospital_loader_duration_seconds{{{label}}} '
+            f'{summary["seconds"]}',
+            '# HELP hospital_loader_last_run_timestamp_seconds End of the '
+            'last run.',
+            '# TYPE hospital_loader_last_run_timestamp_seconds gauge',
+            f'hospital_loader_last_run_timestamp_seconds{{{label}}} '
+            f'{time.time():.0f}',
+        ]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
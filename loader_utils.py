@@ -0,0 +1,315 @@
+"""
+This module contains helpers shared by the load-hhs.py and load-quality.py
+loaders.
+"""
+
+import contextlib
+import hashlib
+import logging
+import queue
+import threading
+from datetime import timedelta
+import numpy as np
+import psycopg
+from psycopg import errors
+from psycopg.pq import TransactionStatus
+import credentials
+import queries
+
+DB_HOST = "pinniped.postgres.database.azure.com"
+
+# Send the transaction of a batch in pipeline mode when libpq supports it.
+# Benchmarks turn it off to measure the difference.
+USE_PIPELINE = True
+
+# marks the end of the chunk stream for the writer thread
+_END_OF_CHUNKS = object()
+
+
+def connect(**kwargs):
+    """
+    Open a connection to the hospital database.
+
+    Parameters:
+    - kwargs: Extra arguments for psycopg.connect, such as autocommit.
+
+    Returns:
+    - psycopg.Connection: The new connection.
+    """
+    return psycopg.connect(
+        host=DB_HOST,
+        dbname=credentials.DB_USER,
+        user=credentials.DB_USER,
+        password=credentials.DB_PASSWORD,
+        **kwargs
+    )
+
+
+@contextlib.contextmanager
+def batch_transaction(conn, pipelined=True):
+    """
+    Run the statements of a batch in one transaction.
+
+    On an autocommit connection, and when libpq supports it, the transaction
+    is sent in a single pipeline: BEGIN, the statements and COMMIT are
+    queued and the pipeline syncs once, when the block exits, so the batch
+    waits for the server once instead of once per statement. (A
+    conn.transaction() inside conn.pipeline() would also sync on entering
+    and on leaving the transaction.) Otherwise this is conn.transaction().
+
+    Parameters:
+    - conn (psycopg.Connection): Database connection object.
+    - pipelined (bool): Whether the caller's statements can be pipelined;
+        COPY cannot.
+
+    Notes:
+    - Errors of pipelined statements are raised at the latest when the
+      block exits, after the transaction was rolled back.
+    """
+    if not (pipelined and conn.autocommit and USE_PIPELINE
+            and psycopg.Pipeline.is_supported()):
+        with conn.transaction():
+            yield
+        return
+
+    try:
+        with conn.pipeline():
+            conn.execute("BEGIN")
+            yield
+            conn.execute("COMMIT")
+    except BaseException:
+        # the pipeline has synced, so a failed transaction is still open
+        if conn.info.transaction_status != TransactionStatus.IDLE:
+            try:
+                conn.execute("ROLLBACK")
+            except psycopg.Error as e:
+                logging.warning(f"Rolling back the failed batch failed: {e}")
+        raise
+
+
+def fetch_known_hospital_pks(conn):
+    """
+    Fetch the primary keys of all hospitals in HospitalSpecificDetails.
+
+    Parameters:
+    - conn (psycopg.Connection): Database connection object.
+
+    Returns:
+    - set: The hospital_pk values already stored in the database.
+    """
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute(queries.HOSPITAL_PKS_SELECT_QUERY)
+            return {row[0] for row in cur}
+
+
+def select_new_hospitals(batch_df, known_pks):
+    """
+    Select the hospitals of a batch that are not in HospitalSpecificDetails.
+
+    Parameters:
+    - batch_df (pd.DataFrame): Processed batch with a 'hospital_pk' column.
+    - known_pks (set): hospital_pk values already stored in the database.
+
+    Returns:
+    - pd.DataFrame: One row per new hospital, sorted by hospital_pk so that
+        concurrent loaders insert them in the same order.
+    """
+    new_hospitals = batch_df[~batch_df['hospital_pk'].isin(known_pks)]
+    return new_hospitals.drop_duplicates('hospital_pk').\
+        sort_values('hospital_pk')
+
+
+def db_values(column):
+    """
+    Convert a column of a processed frame to Python-native values for
+    psycopg, one column at a time so the frame itself is never copied.
+
+    Parameters:
+    - column (pd.Series): Processed column, possibly using a nullable dtype
+        such as Int64, boolean or string.
+
+    Returns:
+    - list: The values of the column as plain Python objects, with every
+        missing value (NaN, NaT, <NA>) as None.
+    """
+    return np.where(column.isna(), None, column.to_numpy(object)).tolist()
+
+
+def row_tuples(data, columns):
+    """
+    Build the parameter rows of an insert from the columns of a processed
+    frame, without creating a Series per row as iterrows() does.
+
+    Parameters:
+    - data (pd.DataFrame): Processed data.
+    - columns (list): Columns in the order of the query parameters.
+
+    Returns:
+    - list: One tuple per row of data, with missing values as None.
+    """
+    return list(zip(*(db_values(data[column]) for column in columns)))
+
+
+def ensure_logistics_partitions(conn, years, known_years):
+    """
+    Create the yearly HospitalLogistics partitions that rows of the given
+    years will be inserted into.
+
+    Parameters:
+    - conn (psycopg.Connection): Database connection object.
+    - years (iterable): Years of the collection weeks about to be inserted.
+    - known_years (set): Years whose partition is known to exist. Created
+        partitions are added to it, so each is only checked once per load.
+    """
+    for year in sorted(set(years) - known_years):
+        query = queries.HOSPITAL_LOGISTICS_PARTITION_CREATE_QUERY.format(
+            year=int(year), next_year=int(year) + 1)
+        try:
+            with conn.transaction():
+                conn.execute(query)
+        except (errors.DuplicateTable, errors.UniqueViolation):
+            # created concurrently by another loader
+            pass
+        known_years.add(year)
+
+
+def refresh_weekly_summaries(conn, weeks):
+    """
+    Recompute the WeeklyLogisticsSummary and WeeklyStateLogisticsSummary
+    rows of the given collection weeks from HospitalLogistics, dropping the
+    per-state rows of states that no longer have a hospital in a week.
+    """
+    if not weeks:
+        return
+    params = {'weeks': sorted(weeks)}
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute(queries.WEEKLY_LOGISTICS_SUMMARY_REFRESH_QUERY, params)
+            cur.execute(queries.WEEKLY_STATE_LOGISTICS_SUMMARY_REFRESH_QUERY,
+                        params)
+            cur.execute(
+                queries.WEEKLY_STATE_LOGISTICS_SUMMARY_DELETE_EMPTY_QUERY,
+                params)
+    logging.info(f"Refreshed weekly summaries for {len(weeks)} weeks")
+
+
+def refresh_covid_deltas(conn, weeks):
+    """
+    Recompute the HospitalWeeklyCovidDelta and StateWeeklyCovidDelta rows of
+    the given collection weeks and of the week after each of them, whose
+    previous week changed. Must run after refresh_weekly_summaries.
+    """
+    if not weeks:
+        return
+    weeks = set(weeks) | {week + timedelta(weeks=1) for week in weeks}
+    params = {'weeks': sorted(weeks)}
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute(queries.HOSPITAL_WEEKLY_COVID_DELTA_REFRESH_QUERY,
+                        params)
+            cur.execute(queries.STATE_WEEKLY_COVID_DELTA_REFRESH_QUERY,
+                        params)
+            cur.execute(queries.STATE_WEEKLY_COVID_DELTA_DELETE_EMPTY_QUERY,
+                        params)
+    logging.info(f"Refreshed COVID deltas for {len(weeks)} weeks")
+
+
+def file_hash(file_path):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_loaded(conn, content_hash, table_name):
+    """
+    Return True if a file with this content was already loaded into
+    table_name according to LoadHistory.
+    """
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute(queries.LOAD_HISTORY_HASH_EXISTS_QUERY,
+                        (content_hash, table_name))
+            return cur.fetchone()[0]
+
+
+def record_load(conn, source_file, table_name, row_count, content_hash=None,
+                first_week=None, last_week=None):
+    """
+    Record a completed file load in LoadHistory, which also bumps the data
+    version used by the dashboard to invalidate its cached reports.
+
+    Parameters:
+    - conn (psycopg.Connection): Database connection object.
+    - source_file (str): Path of the loaded file.
+    - table_name (str): Main table the file was loaded into.
+    - row_count (int): Number of processed rows in the file.
+    - content_hash (str): file_hash() of the file, used to skip it when it
+        is loaded again.
+    - first_week, last_week (datetime.date): Range of weeks in the file.
+    """
+    with conn.transaction():
+        with conn.cursor() as cur:
+            cur.execute(queries.LOAD_HISTORY_INSERT_QUERY,
+                        (source_file, table_name, row_count, content_hash,
+                         first_week, last_week))
+
+
+def run_pipelined(chunks, write_chunk, max_pending=2):
+    """
+    Write chunks on a background thread while the next chunks are produced.
+
+    Parameters:
+    - chunks (iterable): Preprocessed chunks, usually a generator that reads
+        and cleans the CSV file lazily. It is consumed on the calling thread.
+    - write_chunk (callable): Called with each chunk on the writer thread,
+        typically to insert it into the database.
+    - max_pending (int): Maximum number of produced chunks waiting for the
+        writer. Producing blocks once the queue is full, which bounds memory
+        to roughly max_pending + 2 chunks.
+
+    Notes:
+    - If write_chunk raises, no further chunks are produced or written and
+      the exception is re-raised in the calling thread.
+    - If producing a chunk raises, the writer finishes the chunk it is
+      working on, the remaining queued chunks are dropped and the exception
+      propagates after the writer thread has stopped.
+    """
+    pending = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    failures = []
+
+    def writer():
+        while True:
+            chunk = pending.get()
+            if chunk is _END_OF_CHUNKS:
+                return
+            if stop.is_set():
+                # keep draining so the producer never blocks on a full queue
+                continue
+            try:
+                write_chunk(chunk)
+            except BaseException as e:
+                logging.error(f"Writer thread failed: {e}")
+                failures.append(e)
+                stop.set()
+
+    thread = threading.Thread(target=writer, name="db-writer", daemon=True)
+    thread.start()
+    try:
+        for chunk in chunks:
+            if stop.is_set():
+                break
+            pending.put(chunk)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        pending.put(_END_OF_CHUNKS)
+        thread.join()
+
+    if failures:
+        raise failures[0]
@@ -0,0 +1,157 @@
+"""
+Maintain the partitioning of the HospitalLogistics table and the tables
+derived from it.
+
+Subcommands:
+- migrate: convert an existing, unpartitioned HospitalLogistics table (from
+  before create-tables.py partitioned it) into the partitioned layout,
+  keeping its rows.
+- check: run EXPLAIN on every dashboard report for a week and show how many
+  HospitalLogistics partitions each one scans.
+- rebuild: recompute the weekly rollups, COVID deltas and reporting status
+  from every week in HospitalLogistics, for rows loaded before load-hhs.py
+  maintained them.
+
+This can be run like this:
+    python partition-logistics.py migrate
+    python partition-logistics.py check 2022-09-23
+    python partition-logistics.py rebuild
+"""
+
+import argparse
+import sys
+from datetime import datetime
+import loader_utils
+import queries
+import reports
+
+# Reports that filter HospitalLogistics on a single collection week and so
+# must only scan the partitions of that week. Reports 5 and 6 read the
+# weekly COVID delta tables, and report 7 takes the latest week of every
+# hospital over the whole history.
+WEEK_FILTERED_REPORTS = {'rpt_3'}
+
+# collection weeks recomputed per transaction by rebuild
+REBUILD_BATCH_WEEKS = 52
+
+
+def migrate(conn):
+    """
+    Move the rows of an unpartitioned HospitalLogistics table into the
+    partitioned layout, in a single transaction.
+    """
+    with conn.transaction():
+        is_partitioned = conn.execute(
+            queries.HOSPITAL_LOGISTICS_IS_PARTITIONED_QUERY).fetchone()[0]
+        if is_partitioned:
+            print("HospitalLogistics is already partitioned.")
+            return
+
+        conn.execute(queries.HOSPITAL_LOGISTICS_RENAME_UNPARTITIONED_QUERY)
+        conn.execute(queries.HOSPITAL_LOGISTICS_CREATE_QUERY)
+        years = [row[0] for row in conn.execute(
+            queries.HOSPITAL_LOGISTICS_UNPARTITIONED_YEARS_QUERY)]
+        loader_utils.ensure_logistics_partitions(conn, years, set())
+        copied = conn.execute(
+            queries.HOSPITAL_LOGISTICS_COPY_UNPARTITIONED_QUERY).rowcount
+        conn.execute(queries.HOSPITAL_LOGISTICS_DROP_UNPARTITIONED_QUERY)
+    print(f"Moved {copied} rows into {len(years)} yearly partitions "
+          "of HospitalLogistics.")
+
+
+def rebuild(conn, batch_weeks=REBUILD_BATCH_WEEKS):
+    """
+    Recompute the weekly rollups, COVID deltas and reporting status of
+    every collection week in HospitalLogistics, batch_weeks weeks at a
+    time. load-hhs.py only refreshes the weeks it inserts rows into, so
+    rows loaded before these tables existed, or skipped as already loaded,
+    are only counted here.
+    """
+    weeks = [row[0] for row in conn.execute(
+        queries.HOSPITAL_LOGISTICS_WEEKS_QUERY)]
+    for start in range(0, len(weeks), batch_weeks):
+        batch = weeks[start:start + batch_weeks]
+        loader_utils.refresh_weekly_summaries(conn, batch)
+        loader_utils.refresh_covid_deltas(conn, batch)
+        with conn.transaction():
+            conn.execute(queries.HOSPITAL_REPORTING_STATUS_REBUILD_QUERY,
+                         {'weeks': batch})
+        print(f"Rebuilt weeks {batch[0]} to {batch[-1]}")
+    print(f"Rebuilt the weekly rollups, COVID deltas and reporting status "
+          f"of {len(weeks)} collection weeks.")
+
+
+def scanned_relations(plan):
+    """Return the names of all relations scanned by an EXPLAIN JSON plan."""
+    relations = set()
+    if 'Relation Name' in plan:
+        relations.add(plan['Relation Name'].lower())
+    for child in plan.get('Plans', []):
+        relations |= scanned_relations(child)
+    return relations
+
+
+def check(conn, selected_week):
+    """
+    Show how many HospitalLogistics partitions each dashboard report scans.
+
+    Returns:
+    - bool: True if every week-filtered report skips at least one partition,
+        or there are too few partitions to tell.
+    """
+    partitions = {row[0].lower() for row in conn.execute(
+        queries.HOSPITAL_LOGISTICS_PARTITIONS_QUERY)}
+    params = reports.report_params(selected_week)
+    all_pruned = True
+    print(f"HospitalLogistics has {len(partitions)} partitions")
+    for report_id, query in reports.REPORT_QUERIES.items():
+        explain = conn.execute("EXPLAIN (FORMAT JSON) " + query,
+                               params).fetchone()[0]
+        scanned = scanned_relations(explain[0]['Plan']) & partitions
+        if not scanned:
+            status = "does not read HospitalLogistics"
+        elif len(scanned) < len(partitions):
+            status = "pruned"
+        else:
+            status = "scans all partitions"
+            if report_id in WEEK_FILTERED_REPORTS and len(partitions) > 2:
+                status += " (expected pruning)"
+                all_pruned = False
+        print(f"{report_id}: {len(scanned)} of {len(partitions)} "
+              f"partitions scanned, {status}")
+    return all_pruned
+
+
+def parse_args(argv):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Maintain the partitioning of HospitalLogistics and "
+                    "the tables derived from it.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("migrate",
+                          help="partition an existing HospitalLogistics")
+    check_parser = subparsers.add_parser(
+        "check", help="confirm dashboard queries prune partitions")
+    check_parser.add_argument(
+        "selected_week",
+        type=lambda x: datetime.strptime(x, "%Y-%m-%d").date(),
+        help="week to run the reports for (YYYY-MM-DD)")
+    subparsers.add_parser("rebuild",
+                          help="recompute the tables derived from "
+                               "HospitalLogistics")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    with loader_utils.connect(autocommit=True) as conn:
+        if args.command == "migrate":
+            migrate(conn)
+        elif args.command == "rebuild":
+            rebuild(conn)
+        elif not check(conn, args.selected_week):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
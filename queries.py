@@ -5,6 +5,11 @@ HospitalLogistics and HospitalSpecificDetails tables in the hospital database.
 
 # Hospital Logistics Queries
 
+# HospitalLogistics is range-partitioned by collection_week, with one
+# partition per year created on demand by the loaders
+# (HOSPITAL_LOGISTICS_PARTITION_CREATE_QUERY). The collection_week index lets
+# the dashboard's single-week filters avoid scanning a whole partition.
+
 HOSPITAL_LOGISTICS_CREATE_QUERY = """
 DROP TABLE IF EXISTS HospitalLogistics CASCADE;
 CREATE TABLE IF NOT EXISTS HospitalLogistics (
@@ -28,9 +33,75 @@ CREATE TABLE IF NOT EXISTS HospitalLogistics (
     CONSTRAINT check_total_beds_greater_than_used_beds CHECK (
        total_icu_beds_7_day_avg >= icu_beds_used_7_day_avg
     )
+) PARTITION BY RANGE (collection_week);
+CREATE INDEX IF NOT EXISTS hospital_logistics_collection_week_idx
+    ON HospitalLogistics (collection_week);
+"""
+
+HOSPITAL_LOGISTICS_LOADED_KEYS_QUERY = """
+SELECT hospital_pk, collection_week
+FROM HospitalLogistics
+WHERE collection_week = ANY(%(weeks)s);
+"""
+
+HOSPITAL_LOGISTICS_WEEKS_QUERY = """
+SELECT DISTINCT collection_week
+FROM HospitalLogistics
+ORDER BY collection_week;
+"""
+
+HOSPITAL_LOGISTICS_HOSPITAL_WEEKS_QUERY = """
+SELECT DISTINCT collection_week
+FROM HospitalLogistics
+WHERE hospital_pk = ANY(%(hospital_pks)s);
+"""
+
+HOSPITAL_LOGISTICS_PARTITION_CREATE_QUERY = """
+CREATE TABLE IF NOT EXISTS HospitalLogistics_y{year}
+    PARTITION OF HospitalLogistics
+    FOR VALUES FROM ('{year}-01-01') TO ('{next_year}-01-01');
+"""
+
+HOSPITAL_LOGISTICS_PARTITIONS_QUERY = """
+SELECT c.relname
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'hospitallogistics'::regclass;
+"""
+
+# Migration of an existing, unpartitioned HospitalLogistics table: the old
+# table is renamed, the partitioned table is created in its place, and the
+# rows are copied over once the partitions for their years exist.
+
+HOSPITAL_LOGISTICS_IS_PARTITIONED_QUERY = """
+SELECT EXISTS (
+    SELECT 1 FROM pg_partitioned_table
+    WHERE partrelid = 'hospitallogistics'::regclass
 );
 """
 
+HOSPITAL_LOGISTICS_RENAME_UNPARTITIONED_QUERY = """
+ALTER TABLE HospitalLogistics RENAME TO HospitalLogistics_unpartitioned;
+ALTER INDEX IF EXISTS hospitallogistics_pkey
+    RENAME TO hospitallogistics_unpartitioned_pkey;
+"""
+
+HOSPITAL_LOGISTICS_UNPARTITIONED_YEARS_QUERY = """
+SELECT DISTINCT EXTRACT(YEAR FROM collection_week)::INTEGER
+FROM HospitalLogistics_unpartitioned
+WHERE collection_week IS NOT NULL;
+"""
+
+HOSPITAL_LOGISTICS_COPY_UNPARTITIONED_QUERY = """
+INSERT INTO HospitalLogistics
+SELECT * FROM HospitalLogistics_unpartitioned
+WHERE collection_week IS NOT NULL;
+"""
+
+HOSPITAL_LOGISTICS_DROP_UNPARTITIONED_QUERY = """
+DROP TABLE HospitalLogistics_unpartitioned;
+"""
+
 HOSPITAL_LOGISTICS_INSERT_QUERY = """
 INSERT INTO HospitalLogistics (
     hospital_pk,
@@ -79,6 +150,10 @@ INSERT INTO HospitalSpecificDetails (
 ON CONFLICT (hospital_pk) DO NOTHING;
 """
 
+HOSPITAL_PKS_SELECT_QUERY = """
+SELECT hospital_pk FROM HospitalSpecificDetails;
+"""
+
 HOSPITAL_QUALITY_DETAILS_CREATE_QUERY = """
 DROP TABLE IF EXISTS HospitalQualityDetail CASCADE;
 CREATE TABLE IF NOT EXISTS HospitalQualityDetails (
@@ -106,13 +181,688 @@ STATIC_DETAILS_INSERT_QUERY = """
     ON CONFLICT (hospital_pk) DO NOTHING;
 """
 
-STATIC_DETAILS_UPDATE_QUERY = """
-    UPDATE HospitalSpecificDetails
-    SET
-        hospital_name = %s,
-        address = %s,
-        city = %s,
-        zip = %s,
-        state = %s
-    WHERE hospital_pk = %s;
+# Staging table used by the COPY load mode of load-hhs.py. It is a temporary
+# table, so it is unlogged and private to the loading session, and its rows
+# are discarded when each batch transaction commits or rolls back.
+
+HOSPITAL_LOGISTICS_STAGING_CREATE_QUERY = """
+CREATE TEMP TABLE IF NOT EXISTS HospitalLogisticsStaging (
+    hospital_pk TEXT,
+    collection_week DATE,
+    all_adult_hospital_beds_7_day_avg NUMERIC,
+    all_pediatric_inpatient_beds_7_day_avg NUMERIC,
+    all_adult_hospital_inpatient_bed_occupied_7_day_avg NUMERIC,
+    all_pediatric_inpatient_bed_occupied_7_day_avg NUMERIC,
+    total_icu_beds_7_day_avg NUMERIC,
+    icu_beds_used_7_day_avg NUMERIC,
+    inpatient_beds_used_covid_7_day_avg NUMERIC,
+    staffed_icu_adult_patients_confirmed_covid_7_day_avg NUMERIC
+) ON COMMIT DELETE ROWS;
+"""
+
+HOSPITAL_LOGISTICS_STAGING_COPY_QUERY = """
+COPY HospitalLogisticsStaging (
+    hospital_pk,
+    collection_week,
+    all_adult_hospital_beds_7_day_avg,
+    all_pediatric_inpatient_beds_7_day_avg,
+    all_adult_hospital_inpatient_bed_occupied_7_day_avg,
+    all_pediatric_inpatient_bed_occupied_7_day_avg,
+    total_icu_beds_7_day_avg,
+    icu_beds_used_7_day_avg,
+    inpatient_beds_used_covid_7_day_avg,
+    staffed_icu_adult_patients_confirmed_covid_7_day_avg
+) FROM STDIN
+"""
+
+HOSPITAL_LOGISTICS_MERGE_QUERY = """
+INSERT INTO HospitalLogistics (
+    hospital_pk,
+    collection_week,
+    all_adult_hospital_beds_7_day_avg,
+    all_pediatric_inpatient_beds_7_day_avg,
+    all_adult_hospital_inpatient_bed_occupied_7_day_avg,
+    all_pediatric_inpatient_bed_occupied_7_day_avg,
+    total_icu_beds_7_day_avg,
+    icu_beds_used_7_day_avg,
+    inpatient_beds_used_covid_7_day_avg,
+    staffed_icu_adult_patients_confirmed_covid_7_day_avg
+)
+SELECT
+    hospital_pk,
+    collection_week,
+    all_adult_hospital_beds_7_day_avg,
+    all_pediatric_inpatient_beds_7_day_avg,
+    all_adult_hospital_inpatient_bed_occupied_7_day_avg,
+    all_pediatric_inpatient_bed_occupied_7_day_avg,
+    total_icu_beds_7_day_avg,
+    icu_beds_used_7_day_avg,
+    inpatient_beds_used_covid_7_day_avg,
+    staffed_icu_adult_patients_confirmed_covid_7_day_avg
+FROM HospitalLogisticsStaging
+ON CONFLICT (hospital_pk, collection_week) DO NOTHING;
+"""
+
+# Temporary table holding the static hospital details of a CMS file, used to
+# reconcile HospitalSpecificDetails with one set-based UPDATE per file.
+# load_order keeps the last row of a hospital that appears more than once.
+
+STATIC_DETAILS_STAGING_CREATE_QUERY = """
+DROP TABLE IF EXISTS CmsStaticDetailsStaging;
+CREATE TEMP TABLE CmsStaticDetailsStaging (
+    load_order BIGINT GENERATED ALWAYS AS IDENTITY,
+    hospital_pk TEXT,
+    hospital_name TEXT,
+    address TEXT,
+    city TEXT,
+    zip CHAR(5),
+    state CHAR(2)
+);
+"""
+
+STATIC_DETAILS_STAGING_COPY_QUERY = """
+COPY CmsStaticDetailsStaging (
+    hospital_pk, hospital_name, address, city, zip, state
+) FROM STDIN
+"""
+
+# Rows to change are locked in primary key order first, so that concurrent
+# loaders cannot deadlock on each other's updates. Returns each changed
+# hospital and whether its state changed.
+STATIC_DETAILS_RECONCILE_QUERY = """
+WITH staged AS (
+    SELECT DISTINCT ON (hospital_pk)
+        hospital_pk, hospital_name, address, city, zip, state
+    FROM CmsStaticDetailsStaging
+    ORDER BY hospital_pk, load_order DESC
+),
+changed AS (
+    SELECT hs.hospital_pk, hs.state AS previous_state
+    FROM HospitalSpecificDetails hs
+    JOIN staged s ON s.hospital_pk = hs.hospital_pk
+    WHERE (hs.hospital_name, hs.address, hs.city, hs.zip, hs.state)
+        IS DISTINCT FROM (s.hospital_name, s.address, s.city, s.zip, s.state)
+    ORDER BY hs.hospital_pk
+    FOR NO KEY UPDATE OF hs
+)
+UPDATE HospitalSpecificDetails hs
+SET
+    hospital_name = s.hospital_name,
+    address = s.address,
+    city = s.city,
+    zip = s.zip,
+    state = s.state
+FROM staged s
+JOIN changed c ON c.hospital_pk = s.hospital_pk
+WHERE hs.hospital_pk = s.hospital_pk
+RETURNING hs.hospital_pk, c.previous_state IS DISTINCT FROM hs.state;
+"""
+
+# Load History Queries
+
+# One row per file loaded by load-hhs.py or load-quality.py. The latest
+# load_id is the data version the dashboard uses to invalidate its cache.
+# The loaders skip a file whose content_hash was already loaded into the
+# same table. first_week and last_week are the range of collection weeks
+# (or the last_updated date of a CMS file) found in the file.
+
+LOAD_HISTORY_CREATE_QUERY = """
+DROP TABLE IF EXISTS LoadHistory CASCADE;
+CREATE TABLE IF NOT EXISTS LoadHistory (
+    load_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    source_file TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    row_count INTEGER,
+    loaded_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    content_hash TEXT,
+    first_week DATE,
+    last_week DATE
+);
+CREATE INDEX IF NOT EXISTS load_history_content_hash_idx
+    ON LoadHistory (content_hash, table_name);
+"""
+
+LOAD_HISTORY_INSERT_QUERY = """
+INSERT INTO LoadHistory (
+    source_file, table_name, row_count, content_hash, first_week, last_week
+)
+VALUES (%s, %s, %s, %s, %s, %s);
+"""
+
+LOAD_HISTORY_HASH_EXISTS_QUERY = """
+SELECT EXISTS (
+    SELECT 1 FROM LoadHistory
+    WHERE content_hash = %s AND table_name = %s
+);
+"""
+
+DATA_VERSION_QUERY = """
+SELECT COALESCE(MAX(load_id), 0) FROM LoadHistory;
+"""
+
+# Weekly Summary Queries
+
+# Per-week (and per-week and state) rollups of HospitalLogistics read by the
+# dashboard instead of aggregating the whole table. load-hhs.py recomputes
+# the rows of every week it loaded. Sums are NULL when every value of a week
+# is NULL, like SUM over HospitalLogistics. Hospitals without a state are
+# left out of the per-state rollup. load-quality.py recomputes the weeks of
+# hospitals whose state it changed; a state left without hospitals in such
+# a week loses its row.
+
+WEEKLY_LOGISTICS_SUMMARY_CREATE_QUERY = """
+DROP TABLE IF EXISTS WeeklyLogisticsSummary CASCADE;
+CREATE TABLE IF NOT EXISTS WeeklyLogisticsSummary (
+    collection_week DATE PRIMARY KEY,
+    num_records BIGINT NOT NULL,
+    total_adult_beds NUMERIC,
+    total_pediatric_beds NUMERIC,
+    adult_beds_used NUMERIC,
+    pediatric_beds_used NUMERIC,
+    total_icu_beds NUMERIC,
+    icu_beds_used NUMERIC,
+    covid_beds_used NUMERIC,
+    covid_icu_patients NUMERIC,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+"""
+
+WEEKLY_STATE_LOGISTICS_SUMMARY_CREATE_QUERY = """
+DROP TABLE IF EXISTS WeeklyStateLogisticsSummary CASCADE;
+CREATE TABLE IF NOT EXISTS WeeklyStateLogisticsSummary (
+    collection_week DATE,
+    state CHAR(2),
+    num_records BIGINT NOT NULL,
+    total_adult_beds NUMERIC,
+    total_pediatric_beds NUMERIC,
+    adult_beds_used NUMERIC,
+    pediatric_beds_used NUMERIC,
+    total_icu_beds NUMERIC,
+    icu_beds_used NUMERIC,
+    covid_beds_used NUMERIC,
+    covid_icu_patients NUMERIC,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (collection_week, state)
+);
+"""
+
+WEEKLY_LOGISTICS_SUMMARY_REFRESH_QUERY = """
+INSERT INTO WeeklyLogisticsSummary (
+    collection_week, num_records,
+    total_adult_beds, total_pediatric_beds,
+    adult_beds_used, pediatric_beds_used,
+    total_icu_beds, icu_beds_used,
+    covid_beds_used, covid_icu_patients
+)
+SELECT
+    collection_week,
+    COUNT(*),
+    SUM(all_adult_hospital_beds_7_day_avg),
+    SUM(all_pediatric_inpatient_beds_7_day_avg),
+    SUM(all_adult_hospital_inpatient_bed_occupied_7_day_avg),
+    SUM(all_pediatric_inpatient_bed_occupied_7_day_avg),
+    SUM(total_icu_beds_7_day_avg),
+    SUM(icu_beds_used_7_day_avg),
+    SUM(inpatient_beds_used_covid_7_day_avg),
+    SUM(staffed_icu_adult_patients_confirmed_covid_7_day_avg)
+FROM HospitalLogistics
+WHERE collection_week = ANY(%(weeks)s)
+GROUP BY collection_week
+ORDER BY collection_week
+ON CONFLICT (collection_week) DO UPDATE SET
+    num_records = EXCLUDED.num_records,
+    total_adult_beds = EXCLUDED.total_adult_beds,
+    total_pediatric_beds = EXCLUDED.total_pediatric_beds,
+    adult_beds_used = EXCLUDED.adult_beds_used,
+    pediatric_beds_used = EXCLUDED.pediatric_beds_used,
+    total_icu_beds = EXCLUDED.total_icu_beds,
+    icu_beds_used = EXCLUDED.icu_beds_used,
+    covid_beds_used = EXCLUDED.covid_beds_used,
+    covid_icu_patients = EXCLUDED.covid_icu_patients,
+    refreshed_at = now();
+"""
+
+WEEKLY_STATE_LOGISTICS_SUMMARY_REFRESH_QUERY = """
+INSERT INTO WeeklyStateLogisticsSummary (
+    collection_week, state, num_records,
+    total_adult_beds, total_pediatric_beds,
+    adult_beds_used, pediatric_beds_used,
+    total_icu_beds, icu_beds_used,
+    covid_beds_used, covid_icu_patients
+)
+SELECT
+    hl.collection_week,
+    hs.state,
+    COUNT(*),
+    SUM(hl.all_adult_hospital_beds_7_day_avg),
+    SUM(hl.all_pediatric_inpatient_beds_7_day_avg),
+    SUM(hl.all_adult_hospital_inpatient_bed_occupied_7_day_avg),
+    SUM(hl.all_pediatric_inpatient_bed_occupied_7_day_avg),
+    SUM(hl.total_icu_beds_7_day_avg),
+    SUM(hl.icu_beds_used_7_day_avg),
+    SUM(hl.inpatient_beds_used_covid_7_day_avg),
+    SUM(hl.staffed_icu_adult_patients_confirmed_covid_7_day_avg)
+FROM HospitalLogistics hl
+JOIN HospitalSpecificDetails hs ON hs.hospital_pk = hl.hospital_pk
+WHERE hl.collection_week = ANY(%(weeks)s)
+AND hs.state IS NOT NULL
+GROUP BY hl.collection_week, hs.state
+ORDER BY hl.collection_week, hs.state
+ON CONFLICT (collection_week, state) DO UPDATE SET
+    num_records = EXCLUDED.num_records,
+    total_adult_beds = EXCLUDED.total_adult_beds,
+    total_pediatric_beds = EXCLUDED.total_pediatric_beds,
+    adult_beds_used = EXCLUDED.adult_beds_used,
+    pediatric_beds_used = EXCLUDED.pediatric_beds_used,
+    total_icu_beds = EXCLUDED.total_icu_beds,
+    icu_beds_used = EXCLUDED.icu_beds_used,
+    covid_beds_used = EXCLUDED.covid_beds_used,
+    covid_icu_patients = EXCLUDED.covid_icu_patients,
+    refreshed_at = now();
+"""
+
+WEEKLY_STATE_LOGISTICS_SUMMARY_DELETE_EMPTY_QUERY = """
+DELETE FROM WeeklyStateLogisticsSummary ws
+WHERE ws.collection_week = ANY(%(weeks)s)
+AND NOT EXISTS (
+    SELECT 1
+    FROM HospitalLogistics hl
+    JOIN HospitalSpecificDetails hs ON hs.hospital_pk = hl.hospital_pk
+    WHERE hl.collection_week = ws.collection_week
+    AND hs.state = ws.state
+);
+"""
+
+# Weekly COVID Delta Queries
+
+# Week-over-week change in COVID beds used, per hospital and per state,
+# read by the "State COVID Cases" and "Hospital COVID Cases" reports.
+# load-hhs.py recomputes the rows of every week it loaded and of the week
+# after it, whose previous week changed, and load-quality.py does the same
+# for the weeks whose per-state rollup it recomputed. A state delta whose
+# rollup row is gone is deleted. previous_covid_beds is NULL when the
+# hospital (or state) has no row for the week before. The partial indexes
+# serve the reports' top-10 lookups of one week.
+
+HOSPITAL_WEEKLY_COVID_DELTA_CREATE_QUERY = """
+DROP TABLE IF EXISTS HospitalWeeklyCovidDelta CASCADE;
+CREATE TABLE IF NOT EXISTS HospitalWeeklyCovidDelta (
+    hospital_pk TEXT REFERENCES HospitalSpecificDetails(hospital_pk),
+    collection_week DATE,
+    covid_beds NUMERIC,
+    previous_covid_beds NUMERIC,
+    covid_beds_change NUMERIC,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (hospital_pk, collection_week)
+);
+CREATE INDEX IF NOT EXISTS hospital_weekly_covid_delta_change_idx
+    ON HospitalWeeklyCovidDelta (collection_week, ABS(covid_beds_change) DESC)
+    WHERE previous_covid_beds <> 0 AND covid_beds_change IS NOT NULL;
+"""
+
+STATE_WEEKLY_COVID_DELTA_CREATE_QUERY = """
+DROP TABLE IF EXISTS StateWeeklyCovidDelta CASCADE;
+CREATE TABLE IF NOT EXISTS StateWeeklyCovidDelta (
+    state CHAR(2),
+    collection_week DATE,
+    covid_beds NUMERIC,
+    previous_covid_beds NUMERIC,
+    covid_beds_change NUMERIC,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (state, collection_week)
+);
+CREATE INDEX IF NOT EXISTS state_weekly_covid_delta_change_idx
+    ON StateWeeklyCovidDelta (collection_week, covid_beds_change DESC)
+    WHERE previous_covid_beds <> 0 AND covid_beds_change IS NOT NULL;
+"""
+
+HOSPITAL_WEEKLY_COVID_DELTA_REFRESH_QUERY = """
+INSERT INTO HospitalWeeklyCovidDelta (
+    hospital_pk, collection_week,
+    covid_beds, previous_covid_beds, covid_beds_change
+)
+SELECT
+    cur.hospital_pk,
+    cur.collection_week,
+    cur.inpatient_beds_used_covid_7_day_avg,
+    prev.inpatient_beds_used_covid_7_day_avg,
+    cur.inpatient_beds_used_covid_7_day_avg
+        - prev.inpatient_beds_used_covid_7_day_avg
+FROM HospitalLogistics cur
+LEFT JOIN HospitalLogistics prev
+    ON prev.hospital_pk = cur.hospital_pk
+    AND prev.collection_week = cur.collection_week - 7
+WHERE cur.collection_week = ANY(%(weeks)s)
+ORDER BY cur.hospital_pk, cur.collection_week
+ON CONFLICT (hospital_pk, collection_week) DO UPDATE SET
+    covid_beds = EXCLUDED.covid_beds,
+    previous_covid_beds = EXCLUDED.previous_covid_beds,
+    covid_beds_change = EXCLUDED.covid_beds_change,
+    refreshed_at = now();
+"""
+
+# Built from the per-state rollup, so it must run after the weekly summaries
+# of the same weeks were refreshed.
+STATE_WEEKLY_COVID_DELTA_REFRESH_QUERY = """
+INSERT INTO StateWeeklyCovidDelta (
+    state, collection_week,
+    covid_beds, previous_covid_beds, covid_beds_change
+)
+SELECT
+    cur.state,
+    cur.collection_week,
+    cur.covid_beds_used,
+    prev.covid_beds_used,
+    cur.covid_beds_used - prev.covid_beds_used
+FROM WeeklyStateLogisticsSummary cur
+LEFT JOIN WeeklyStateLogisticsSummary prev
+    ON prev.state = cur.state
+    AND prev.collection_week = cur.collection_week - 7
+WHERE cur.collection_week = ANY(%(weeks)s)
+ORDER BY cur.state, cur.collection_week
+ON CONFLICT (state, collection_week) DO UPDATE SET
+    covid_beds = EXCLUDED.covid_beds,
+    previous_covid_beds = EXCLUDED.previous_covid_beds,
+    covid_beds_change = EXCLUDED.covid_beds_change,
+    refreshed_at = now();
+"""
+
+STATE_WEEKLY_COVID_DELTA_DELETE_EMPTY_QUERY = """
+DELETE FROM StateWeeklyCovidDelta d
+WHERE d.collection_week = ANY(%(weeks)s)
+AND NOT EXISTS (
+    SELECT 1
+    FROM WeeklyStateLogisticsSummary ws
+    WHERE ws.state = d.state
+    AND ws.collection_week = d.collection_week
+);
+"""
+
+# Hospital Reporting Status Queries
+
+# One row per hospital that reported to HospitalLogistics, with its first
+# and last collection week and a bitmap of the weeks it reported: bit n
+# (counted from the left, as by get_bit and substring) is set when the
+# hospital reported in the n-th week after the epoch, Friday 2020-01-03.
+# load-hhs.py updates it in the transaction of every batch it inserts, so
+# reporting gaps over any window are read from one row per hospital.
+
+HOSPITAL_REPORTING_STATUS_CREATE_QUERY = """
+DROP TABLE IF EXISTS HospitalReportingStatus CASCADE;
+CREATE TABLE IF NOT EXISTS HospitalReportingStatus (
+    hospital_pk TEXT PRIMARY KEY
+        REFERENCES HospitalSpecificDetails(hospital_pk),
+    first_week DATE NOT NULL CHECK (first_week >= DATE '2020-01-03'),
+    last_week DATE NOT NULL,
+    reported_weeks BIT VARYING NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+"""
+
+# Each (hospital_pk, collection_week) pair of a batch becomes a bit string
+# with only its week's bit set, padded to the hospital's last week in the
+# batch so that bit_or can combine them. Existing bitmaps are padded to the
+# longer of the two before being combined.
+HOSPITAL_REPORTING_STATUS_UPDATE_QUERY = """
+WITH reported AS (
+    SELECT DISTINCT
+        hospital_pk,
+        collection_week,
+        (collection_week - DATE '2020-01-03') / 7 AS week_number
+    FROM unnest(%(hospital_pks)s::text[], %(weeks)s::date[])
+        AS batch(hospital_pk, collection_week)
+),
+padded AS (
+    SELECT
+        hospital_pk,
+        collection_week,
+        week_number,
+        MAX(week_number) OVER (PARTITION BY hospital_pk) AS last_week_number
+    FROM reported
+)
+INSERT INTO HospitalReportingStatus AS rs (
+    hospital_pk, first_week, last_week, reported_weeks
+)
+SELECT
+    hospital_pk,
+    MIN(collection_week),
+    MAX(collection_week),
+    bit_or(rpad(repeat('0', week_number) || '1', last_week_number + 1,
+                '0')::varbit)
+FROM padded
+GROUP BY hospital_pk
+ORDER BY hospital_pk
+ON CONFLICT (hospital_pk) DO UPDATE SET
+    first_week = LEAST(rs.first_week, EXCLUDED.first_week),
+    last_week = GREATEST(rs.last_week, EXCLUDED.last_week),
+    reported_weeks =
+        rpad(rs.reported_weeks::text,
+             GREATEST(length(rs.reported_weeks),
+                      length(EXCLUDED.reported_weeks)), '0')::varbit
+        | rpad(EXCLUDED.reported_weeks::text,
+               GREATEST(length(rs.reported_weeks),
+                        length(EXCLUDED.reported_weeks)), '0')::varbit,
+    refreshed_at = now();
+"""
+
+# The same from the rows of HospitalLogistics in the given weeks, for data
+# loaded before load-hhs.py maintained the table. Bits are only ever set,
+# so rebuilding a week that is already tracked changes nothing.
+HOSPITAL_REPORTING_STATUS_REBUILD_QUERY = """
+WITH reported AS (
+    SELECT DISTINCT
+        hospital_pk,
+        collection_week,
+        (collection_week - DATE '2020-01-03') / 7 AS week_number
+    FROM HospitalLogistics
+    WHERE collection_week = ANY(%(weeks)s)
+    AND collection_week >= DATE '2020-01-03'
+),
+padded AS (
+    SELECT
+        hospital_pk,
+        collection_week,
+        week_number,
+        MAX(week_number) OVER (PARTITION BY hospital_pk) AS last_week_number
+    FROM reported
+)
+INSERT INTO HospitalReportingStatus AS rs (
+    hospital_pk, first_week, last_week, reported_weeks
+)
+SELECT
+    hospital_pk,
+    MIN(collection_week),
+    MAX(collection_week),
+    bit_or(rpad(repeat('0', week_number) || '1', last_week_number + 1,
+                '0')::varbit)
+FROM padded
+GROUP BY hospital_pk
+ORDER BY hospital_pk
+ON CONFLICT (hospital_pk) DO UPDATE SET
+    first_week = LEAST(rs.first_week, EXCLUDED.first_week),
+    last_week = GREATEST(rs.last_week, EXCLUDED.last_week),
+    reported_weeks =
+        rpad(rs.reported_weeks::text,
+             GREATEST(length(rs.reported_weeks),
+                      length(EXCLUDED.reported_weeks)), '0')::varbit
+        | rpad(EXCLUDED.reported_weeks::text,
+               GREATEST(length(rs.reported_weeks),
+                        length(EXCLUDED.reported_weeks)), '0')::varbit,
+    refreshed_at = now();
+"""
+
+# Quality Rating Period Queries
+
+# The quality rating in effect for each hospital over time, so that a
+# collection week joins exactly one HospitalQualityDetails snapshot: the
+# latest one updated on or before the week. A hospital's first snapshot
+# also covers the weeks before it, and its last one has no end.
+# load-quality.py rebuilds the periods of every hospital in the file it
+# loaded. Concurrent loads can rebuild the same hospitals, so the rebuild
+# first locks their HospitalSpecificDetails rows in primary key order: the
+# second load then waits, and its DELETE sees the periods the first one
+# inserted.
+
+HOSPITAL_QUALITY_RATING_PERIODS_CREATE_QUERY = """
+DROP TABLE IF EXISTS HospitalQualityRatingPeriods CASCADE;
+CREATE TABLE IF NOT EXISTS HospitalQualityRatingPeriods (
+    hospital_pk TEXT REFERENCES HospitalSpecificDetails(hospital_pk),
+    effective_from DATE,
+    effective_to DATE NOT NULL,
+    hospital_overall_rating NUMERIC,
+    PRIMARY KEY (hospital_pk, effective_from),
+    CHECK (effective_from < effective_to)
+);
+"""
+
+HOSPITAL_QUALITY_RATING_PERIODS_LOCK_QUERY = """
+SELECT hospital_pk
+FROM HospitalSpecificDetails
+WHERE hospital_pk IN (
+    SELECT hospital_pk FROM HospitalQualityDetails
+    WHERE last_updated = %(last_updated)s
+)
+ORDER BY hospital_pk
+FOR NO KEY UPDATE;
+"""
+
+HOSPITAL_QUALITY_RATING_PERIODS_DELETE_QUERY = """
+DELETE FROM HospitalQualityRatingPeriods
+WHERE hospital_pk IN (
+    SELECT hospital_pk FROM HospitalQualityDetails
+    WHERE last_updated = %(last_updated)s
+);
+"""
+
+HOSPITAL_QUALITY_RATING_PERIODS_INSERT_QUERY = """
+INSERT INTO HospitalQualityRatingPeriods (
+    hospital_pk, effective_from, effective_to, hospital_overall_rating
+)
+SELECT
+    hospital_pk,
+    CASE WHEN LAG(last_updated) OVER w IS NULL THEN DATE '-infinity'
+         ELSE last_updated END,
+    COALESCE(LEAD(last_updated) OVER w, DATE 'infinity'),
+    hospital_overall_rating
+FROM HospitalQualityDetails
+WHERE hospital_pk IN (
+    SELECT hospital_pk FROM HospitalQualityDetails
+    WHERE last_updated = %(last_updated)s
+)
+WINDOW w AS (PARTITION BY hospital_pk ORDER BY last_updated)
+ORDER BY hospital_pk, last_updated;
+"""
+
+# Reporting Dashboard Queries
+
+# Collection weeks available in the week selector
+AVAILABLE_WEEKS_QUERY = """
+SELECT collection_week as week
+FROM WeeklyLogisticsSummary
+ORDER BY week DESC
+"""
+
+# Report 1: Records Loaded
+RECORDS_LOADED_REPORT_QUERY = """
+SELECT collection_week as week, num_records
+FROM WeeklyLogisticsSummary
+WHERE collection_week <= %(selected_week)s
+ORDER BY collection_week DESC
+"""
+
+# Report 2: Weekly Bed Utilization Summary
+BED_UTILIZATION_SUMMARY_REPORT_QUERY = """
+SELECT
+    collection_week AS Week,
+    COALESCE(total_adult_beds, 0) AS "Total Adult Beds",
+    COALESCE(adult_beds_used, 0) AS "Adult Beds Used",
+    COALESCE(total_pediatric_beds, 0) AS "Total Pediatric Beds",
+    COALESCE(pediatric_beds_used, 0) AS "Pediatric Beds Used",
+    COALESCE(covid_beds_used, 0) AS "Beds Used by COVID Patients"
+FROM WeeklyLogisticsSummary
+WHERE collection_week <= %(selected_week)s
+AND collection_week > %(selected_week)s - INTERVAL '4 weeks'
+ORDER BY collection_week DESC;
+"""
+
+# Report 3: Hospital Bed Usage by Quality Rating
+BED_USAGE_BY_QUALITY_RATING_REPORT_QUERY = """
+SELECT
+    qr.hospital_overall_rating AS "Quality Rating",
+    AVG(hl.all_adult_hospital_inpatient_bed_occupied_7_day_avg /
+        NULLIF(hl.all_adult_hospital_beds_7_day_avg, 0))
+        AS "Average Adult Bed Usage",
+    AVG(hl.all_pediatric_inpatient_bed_occupied_7_day_avg /
+        NULLIF(hl.all_pediatric_inpatient_beds_7_day_avg, 0))
+        AS "Average Pediatric Bed Usage"
+FROM HospitalLogistics hl
+JOIN HospitalQualityRatingPeriods qr
+    ON qr.hospital_pk = hl.hospital_pk
+    AND hl.collection_week >= qr.effective_from
+    AND hl.collection_week < qr.effective_to
+WHERE hl.collection_week = %(selected_week)s
+GROUP BY qr.hospital_overall_rating
+ORDER BY "Quality Rating";
+"""
+
+# Report 4: Total Hospital Beds Used Per Week
+TOTAL_BEDS_USED_REPORT_QUERY = """
+SELECT
+    collection_week AS "Week",
+    adult_beds_used + pediatric_beds_used AS "Total Beds Usage",
+    covid_beds_used AS "COVID Beds Usage",
+    (adult_beds_used + pediatric_beds_used - covid_beds_used)
+        AS "Non-COVID Beds Usage"
+FROM WeeklyLogisticsSummary
+WHERE collection_week <= %(selected_week)s
+ORDER BY "Week";
+"""
+
+# Report 5: States with Largest Increase in COVID Cases
+STATE_COVID_CASES_REPORT_QUERY = """
+SELECT
+    state AS "State",
+    covid_beds AS "COVID Cases This Week",
+    previous_covid_beds AS "COVID Cases Last Week",
+    covid_beds_change AS "Increase In COVID Cases"
+FROM StateWeeklyCovidDelta
+WHERE collection_week = %(selected_week)s
+AND previous_covid_beds <> 0
+AND covid_beds_change IS NOT NULL
+ORDER BY covid_beds_change DESC
+LIMIT 10;
+"""
+
+# Report 6: Hospitals with Biggest Weekly Difference in COVID Cases
+HOSPITAL_COVID_CASES_REPORT_QUERY = """
+SELECT
+    hs.hospital_name AS "Hospital Name",
+    top.covid_beds AS "COVID Cases This Week",
+    top.previous_covid_beds AS "COVID Cases Last Week",
+    ABS(top.covid_beds_change) AS "Difference in Cases"
+FROM (
+    SELECT hospital_pk, covid_beds, previous_covid_beds, covid_beds_change
+    FROM HospitalWeeklyCovidDelta
+    WHERE collection_week = %(selected_week)s
+    AND previous_covid_beds <> 0
+    AND covid_beds_change IS NOT NULL
+    ORDER BY ABS(covid_beds_change) DESC
+    LIMIT 10
+) AS top
+JOIN HospitalSpecificDetails hs ON hs.hospital_pk = top.hospital_pk
+ORDER BY "Difference in Cases" DESC;
+"""
+
+# Report 7: Hospitals That Did Not Report Data
+NON_REPORTING_HOSPITALS_REPORT_QUERY = """
+SELECT
+    hs.hospital_name AS "Hospital Name",
+    rs.last_week AS "Last Reported Date"
+FROM HospitalReportingStatus rs
+JOIN HospitalSpecificDetails hs ON hs.hospital_pk = rs.hospital_pk
+WHERE hs.hospital_name IS NOT NULL
+AND substring(rs.reported_weeks
+              FROM (%(previous_week)s::date - DATE '2020-01-03') / 7 + 1
+              FOR 1) <> B'1'
+ORDER BY hs.hospital_name
 """
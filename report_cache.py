@@ -0,0 +1,96 @@
+"""
+This module contains the result cache used by reporting_dashboard.py so that
+Streamlit reruns do not re-run report queries whose data has not changed.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReportCache:
+    """
+    Thread-safe LRU cache with a time-to-live for report results.
+
+    Entries are keyed by (report_id, selected_week, data_version), where the
+    data version is the latest load recorded in LoadHistory. As soon as a
+    newer data version is seen, entries of older versions are dropped so a
+    week is never shown from before a load that changed it.
+
+    Parameters:
+    - max_entries (int): Maximum number of cached results; the least
+        recently used entry is evicted first.
+    - ttl_seconds (float): Maximum age of a cached result.
+    """
+
+    def __init__(self, max_entries=128, ttl_seconds=600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._data_version = None
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, report_id, selected_week, data_version, compute):
+        """
+        Return the cached result for a report, computing it on a miss.
+
+        Parameters:
+        - report_id (str): Identifier of the report query.
+        - selected_week (datetime.date): Week the report was run for, or None
+            for reports that do not depend on the week.
+        - data_version (int): Latest load recorded by the loaders.
+        - compute (callable): Called without arguments to produce the result
+            (a pd.DataFrame) on a miss.
+
+        Returns:
+        - pd.DataFrame: A copy of the result, safe for the caller to modify.
+        """
+        key = (report_id, selected_week, data_version)
+        with self._lock:
+            if data_version != self._data_version:
+                self._drop_older_versions(data_version)
+            entry = self._entries.get(key)
+            if entry is not None and \
+                    time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1].copy()
+            self.misses += 1
+
+        result = compute()
+
+        with self._lock:
+            if data_version != self._data_version:
+                # a newer load was seen while computing, do not keep this
+                return result.copy()
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result.copy()
+
+    def clear(self):
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit, miss, eviction and entry counts as a dict."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'data_version': self._data_version,
+            }
+
+    def _drop_older_versions(self, data_version):
+        """Forget entries computed before data_version was loaded."""
+        self._data_version = data_version
+        for key in [k for k in self._entries if k[2] != data_version]:
+            del self._entries[key]
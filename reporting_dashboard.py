@@ -1,9 +1,31 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import streamlit as st
 import pandas as pd
-import psycopg
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import ConnectionPool
 import credentials
 import matplotlib.pyplot as plt
-from datetime import timedelta
+import queries
+import reports
+from report_cache import ReportCache
+
+# Connection pool shared by every dashboard session, so widget interactions
+# do not pay for a new connection to the database
+POOL_MIN_SIZE = int(os.environ.get("DASHBOARD_POOL_MIN_SIZE", 1))
+POOL_MAX_SIZE = int(os.environ.get("DASHBOARD_POOL_MAX_SIZE", 8))
+# seconds a connection may stay idle before the pool closes it
+POOL_MAX_IDLE = float(os.environ.get("DASHBOARD_POOL_MAX_IDLE", 600))
+# seconds to wait for a free connection before failing
+POOL_TIMEOUT = float(os.environ.get("DASHBOARD_POOL_TIMEOUT", 30))
+
+# Report results are cached across reruns and sessions until they expire,
+# are evicted, or a loader records a new load in LoadHistory
+REPORT_CACHE_MAX_ENTRIES = 128
+REPORT_CACHE_TTL_SECONDS = 600
 
 
 # Set page configuration to wide mode
@@ -26,22 +48,258 @@ st.markdown(
 )
 
 
-def main():
-    st.title("Hospital Logistics Dashboard")
-
-    # Establish database connection
-    conn = psycopg.connect(
+@st.cache_resource
+def get_connection_pool():
+    """Return the connection pool shared by all dashboard sessions."""
+    conninfo = make_conninfo(
         host="pinniped.postgres.database.azure.com",
         dbname=credentials.DB_USER,
         user=credentials.DB_USER,
         password=credentials.DB_PASSWORD
     )
+    return ConnectionPool(
+        conninfo,
+        min_size=POOL_MIN_SIZE,
+        max_size=POOL_MAX_SIZE,
+        max_idle=POOL_MAX_IDLE,
+        timeout=POOL_TIMEOUT,
+        # health check run on every connection before it is handed out
+        check=ConnectionPool.check_connection,
+        kwargs={'autocommit': True},
+        name="dashboard",
+        open=True,
+    )
+
+
+@st.cache_resource
+def get_acquire_latencies():
+    """Return the recent connection-acquire latencies, in seconds."""
+    return deque(maxlen=1000)
+
+
+@contextmanager
+def borrow_connection(pool=None, latencies=None):
+    """
+    Borrow a pooled connection, recording how long acquiring it took.
+
+    The shared pool and latencies are looked up when not given. Worker
+    threads must pass them, as the st.cache_resource getters belong to the
+    script thread.
+    """
+    if pool is None:
+        pool = get_connection_pool()
+    if latencies is None:
+        latencies = get_acquire_latencies()
+    start_time = time.perf_counter()
+    with pool.connection() as conn:
+        latencies.append(time.perf_counter() - start_time)
+        yield conn
+
+
+@st.cache_resource
+def get_report_cache():
+    """Return the report cache shared by all dashboard sessions."""
+    return ReportCache(max_entries=REPORT_CACHE_MAX_ENTRIES,
+                       ttl_seconds=REPORT_CACHE_TTL_SECONDS)
+
+
+def get_data_version():
+    """Return the id of the latest load recorded in LoadHistory."""
+    with borrow_connection() as conn:
+        return conn.execute(queries.DATA_VERSION_QUERY).fetchone()[0]
+
+
+def fetch_available_weeks(data_version):
+    """Return the available collection weeks, cached per data version."""
+    def run():
+        with borrow_connection() as conn:
+            return reports.available_weeks(conn)
+
+    return get_report_cache().get_or_compute('weeks', None, data_version,
+                                             run)
+
+
+def fetch_report(data_version, report_id, selected_week, cache=None,
+                 pool=None, latencies=None):
+    """
+    Run a report on a pooled connection, or return its cached result. The
+    shared report cache, pool and latencies are looked up when not given.
+    """
+    def run():
+        with borrow_connection(pool, latencies) as conn:
+            return reports.run_report(conn, report_id, selected_week)
+
+    if cache is None:
+        cache = get_report_cache()
+    return cache.get_or_compute(report_id, selected_week, data_version, run)
+
+
+def fetch_reports_concurrently(data_version, selected_week, report_ids):
+    """
+    Fetch several reports at once, each on its own pooled connection, so
+    the total time approaches that of the slowest report.
+
+    Returns:
+    - tuple: A dict of report_id to DataFrame, and a DataFrame with the time
+        taken by each report.
+    """
+    # the shared resources are looked up here, on the script thread, since
+    # the st.cache_resource getters must not run on the worker threads
+    cache = get_report_cache()
+    pool = get_connection_pool()
+    latencies = get_acquire_latencies()
+
+    def timed_fetch(report_id):
+        start_time = time.perf_counter()
+        result = fetch_report(data_version, report_id, selected_week, cache,
+                              pool, latencies)
+        return result, time.perf_counter() - start_time
+
+    workers = max(1, min(len(report_ids), POOL_MAX_SIZE))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {report_id: executor.submit(timed_fetch, report_id)
+                   for report_id in report_ids}
+        results = {report_id: future.result()
+                   for report_id, future in futures.items()}
+
+    timings = pd.DataFrame({
+        'Report': list(results),
+        'Seconds': [seconds for _, seconds in results.values()],
+    })
+    return {k: result for k, (result, _) in results.items()}, timings
+
+
+def show_debug_stats():
+    """
+    Show the report cache hit/miss counts and the connection pool usage,
+    including connection-acquire latency, in a debug sidebar.
+    """
+    stats = get_report_cache().stats()
+    pool_stats = get_connection_pool().get_stats()
+    latencies = pd.Series(list(get_acquire_latencies()), dtype=float) * 1000
+    with st.sidebar.expander("Debug"):
+        st.write(f"Data version: {stats['data_version']}")
+        st.write(f"Cache hits: {stats['hits']}")
+        st.write(f"Cache misses: {stats['misses']}")
+        st.write(f"Cache evictions: {stats['evictions']}")
+        st.write(f"Cached reports: {stats['entries']}")
+        st.write(f"Pool size: {pool_stats.get('pool_size', 0)} "
+                 f"(min {POOL_MIN_SIZE}, max {POOL_MAX_SIZE})")
+        st.write(f"Idle connections: {pool_stats.get('pool_available', 0)}")
+        st.write(f"Waiting requests: {pool_stats.get('requests_waiting', 0)}")
+        if not latencies.empty:
+            st.write(f"Acquire latency (ms): "
+                     f"p50 {latencies.quantile(0.5):.1f}, "
+                     f"p95 {latencies.quantile(0.95):.1f}, "
+                     f"max {latencies.max():.1f} "
+                     f"over {len(latencies)} acquisitions")
+
+
+def render_records_loaded(df_rpt_1):
+    """Render the 'Records Loaded' report."""
+    st.write("## Records Loaded Across Weeks")
+    st.dataframe(df_rpt_1)
+
+
+def render_bed_utilization_summary(df_rpt_2):
+    """Render the 'Bed Utilization Summary' report."""
+    st.write("## Weekly Bed Utilization Summary")
+    st.dataframe(df_rpt_2)
+
+
+def render_bed_usage_by_quality_rating(df_rpt_3):
+    """Render the 'Bed Usage by Quality Rating' report."""
+    fig, ax = plt.subplots(figsize=(10, 5))
+    df_rpt_3.plot(kind="line", x="Quality Rating",
+                  y=["Average Adult Bed Usage",
+                     "Average Pediatric Bed Usage"],
+                  ax=ax)
+
+    plt.title("Average Bed Usage by Hospital Quality Rating")
+    plt.xlabel("Quality Rating")
+    plt.ylabel("Average Bed Usage Fraction")
+    plt.legend()
+    plt.tight_layout()
+
+    st.write("## Hospital Bed Usage by Quality Rating")
+    st.pyplot(fig)
+
+
+def render_total_beds_used(df_rpt_4):
+    """Render the 'Total Beds Used' report."""
+    fig, ax = plt.subplots(figsize=(12, 5))
+    ax.plot(df_rpt_4['Week'], df_rpt_4['Total Beds Usage'],
+            label='Total Beds Used', color='blue')
+    ax.plot(df_rpt_4['Week'], df_rpt_4['COVID Beds Usage'],
+            label='COVID Beds Used', color='green')
+
+    plt.title('Hospital Beds Usage per Week')
+    plt.xlabel('Week')
+    plt.ylabel('Number of Beds Used')
+    plt.legend()
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+
+    st.write("## Total Hospital Beds Used Per Week: COVID vs Non-COVID")
+    st.pyplot(fig)
+
+
+def render_state_covid_cases(df_rpt_5):
+    """Render the 'State COVID Cases' report."""
+    df_rpt_5.index = df_rpt_5.index + 1
+
+    st.write("## 10 States with Largest Increase in COVID Cases")
+    st.dataframe(df_rpt_5.head(10), use_container_width=True)
+
+
+def render_hospital_covid_cases(df_rpt_6):
+    """Render the 'Hospital COVID Cases' report."""
+    df_rpt_6.index = df_rpt_6.index + 1
+
+    st.write("## 10 Hospitals with Biggest Weekly \
+             Difference in COVID Cases")
+    st.dataframe(df_rpt_6.head(10), use_container_width=True)
+
+
+def render_non_reporting_hospitals(df_rpt_7):
+    """Render the 'Non-Reporting Hospitals' report."""
+    df_rpt_7.index = df_rpt_7.index + 1
+
+    st.write("## Hospitals That Did Not Report Data For Selected Week")
+    st.dataframe(df_rpt_7, use_container_width=True)
+
+
+def render_query_timings(timings, page_seconds):
+    """Show how long each report query took next to the page total."""
+    st.write("## Query Timings")
+    st.write(f"All reports fetched in {page_seconds:.2f}s, "
+             f"slowest report {timings['Seconds'].max():.2f}s, "
+             f"sum of reports {timings['Seconds'].sum():.2f}s")
+    st.dataframe(timings)
+
+
+# Report name shown in the selector, and its report id and render function
+REPORTS = {
+    "Records Loaded": ('rpt_1', render_records_loaded),
+    "Bed Utilization Summary": ('rpt_2', render_bed_utilization_summary),
+    "Bed Usage by Quality Rating":
+        ('rpt_3', render_bed_usage_by_quality_rating),
+    "Total Beds Used": ('rpt_4', render_total_beds_used),
+    "State COVID Cases": ('rpt_5', render_state_covid_cases),
+    "Hospital COVID Cases": ('rpt_6', render_hospital_covid_cases),
+    "Non-Reporting Hospitals": ('rpt_7', render_non_reporting_hospitals),
+}
+
+# Selector option that fetches every report concurrently
+ALL_REPORTS = "All Reports"
 
-    # Query to get available collection weeks
-    q_gen_1 = """SELECT distinct collection_week as week
-    FROM HospitalLogistics
-    ORDER BY Week DESC"""
-    all_weeks_hhs = pd.read_sql_query(q_gen_1, conn)
+
+def main():
+    st.title("Hospital Logistics Dashboard")
+
+    # Get available collection weeks
+    data_version = get_data_version()
+    all_weeks_hhs = fetch_available_weeks(data_version)
 
     # Create a dropdown for week selection
     st.title("Select Collection Week")
@@ -52,325 +310,29 @@ def main():
 
     st.write(f"#### You selected: {selected_week}")
 
-    # Create tabs for different reports
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-        "Records Loaded",
-        "Bed Utilization Summary",
-        "Bed Usage by Quality Rating",
-        "Total Beds Used",
-        "State COVID Cases",
-        "Hospital COVID Cases",
-        "Non-Reporting Hospitals"
-    ])
-
-    with tab1:
-        # Report 1: Records Loaded
-        q_rpt_1 = """
-        SELECT collection_week as week, count(*) as num_records
-        FROM HospitalLogistics
-        WHERE collection_week <= %(selected_week)s
-        GROUP BY collection_week
-        ORDER BY collection_week DESC
-        """
-        parameters = {'selected_week': selected_week}
-        df_rpt_1 = pd.read_sql_query(q_rpt_1, conn, params=parameters)
-        st.write("## Records Loaded Across Weeks")
-        st.dataframe(df_rpt_1)
-
-    with tab2:
-        # Report 2: Weekly Bed Utilization Summary
-        q_rpt_2 = """
-        WITH WeeklySummary AS (
-            SELECT
-                collection_week,
-                SUM(COALESCE(all_adult_hospital_beds_7_day_avg, 0))
-                AS total_adult_beds,
-                SUM(COALESCE(all_pediatric_inpatient_beds_7_day_avg, 0))
-                AS total_pediatric_beds,
-                SUM(
-                COALESCE(
-                    all_adult_hospital_inpatient_bed_occupied_7_day_avg,
-                    0
-                )
-                ) AS adult_beds_used,
-                SUM(
-                COALESCE(all_pediatric_inpatient_bed_occupied_7_day_avg, 0))
-                AS pediatric_beds_used,
-                SUM(COALESCE(inpatient_beds_used_covid_7_day_avg, 0))
-                AS beds_used_by_covid
-            FROM HospitalLogistics
-            WHERE collection_week <= %(selected_week)s
-            AND collection_week > %(selected_week)s - INTERVAL '4 weeks'
-            GROUP BY collection_week
-            ORDER BY collection_week DESC
-        )
-        SELECT
-            collection_week AS Week,
-            total_adult_beds AS "Total Adult Beds",
-            adult_beds_used AS "Adult Beds Used",
-            total_pediatric_beds AS "Total Pediatric Beds",
-            pediatric_beds_used AS "Pediatric Beds Used",
-            beds_used_by_covid AS "Beds Used by COVID Patients"
-        FROM WeeklySummary;
-        """
-        parameters = {'selected_week': selected_week}
-        df_rpt_2 = pd.read_sql_query(q_rpt_2, conn, params=parameters)
-        st.write("## Weekly Bed Utilization Summary")
-        st.dataframe(df_rpt_2)
-
-    with tab3:
-        # Report 3: Hospital Bed Usage by Quality Rating
-        q_rpt_3 = """
-        WITH BedUsage AS (
-            SELECT
-                hq.hospital_pk,
-                hq.hospital_overall_rating,
-                SUM(hl.all_adult_hospital_inpatient_bed_occupied_7_day_avg)/
-                NULLIF(SUM(hl.all_adult_hospital_beds_7_day_avg), 0)
-                AS adult_bed_usage_fraction,
-                SUM(hl.all_pediatric_inpatient_bed_occupied_7_day_avg)/
-                NULLIF(SUM(hl.all_pediatric_inpatient_beds_7_day_avg), 0)
-                AS pediatric_bed_usage_fraction
-            FROM
-                HospitalLogistics hl
-            JOIN
-                HospitalQualityDetails hq
-                ON hl.hospital_pk = hq.hospital_pk
-            WHERE
-                hl.collection_week = %(selected_week)s
-            GROUP BY
-                hq.hospital_pk, hq.hospital_overall_rating
-        )
-        SELECT
-            hospital_overall_rating AS "Quality Rating",
-            AVG(adult_bed_usage_fraction) AS "Average Adult Bed Usage",
-            AVG(pediatric_bed_usage_fraction) AS "Average Pediatric Bed Usage"
-        FROM
-            BedUsage
-        GROUP BY
-            hospital_overall_rating
-        ORDER BY
-            "Quality Rating";
-        """
-        parameters = {'selected_week': selected_week}
-        df_rpt_3 = pd.read_sql_query(q_rpt_3, conn, params=parameters)
-
-        fig, ax = plt.subplots(figsize=(10, 5))
-        df_rpt_3.plot(kind="line", x="Quality Rating",
-                      y=["Average Adult Bed Usage",
-                         "Average Pediatric Bed Usage"],
-                      ax=ax)
-
-        plt.title("Average Bed Usage by Hospital Quality Rating")
-        plt.xlabel("Quality Rating")
-        plt.ylabel("Average Bed Usage Fraction")
-        plt.legend()
-        plt.tight_layout()
-
-        st.write("## Hospital Bed Usage by Quality Rating")
-        st.pyplot(fig)
-
-    with tab4:
-        # Report 4: Total Hospital Beds Used Per Week
-        q_rpt_4 = """
-        WITH BedUsage AS (
-            SELECT
-                collection_week,
-                SUM(all_adult_hospital_inpatient_bed_occupied_7_day_avg) +
-                SUM(all_pediatric_inpatient_bed_occupied_7_day_avg)
-                    AS total_beds_used,
-                SUM(inpatient_beds_used_covid_7_day_avg) AS covid_beds_used
-            FROM HospitalLogistics
-            WHERE collection_week <= %(selected_week)s
-            GROUP BY collection_week
-            ORDER BY collection_week
-        )
-        SELECT
-            collection_week AS "Week",
-            total_beds_used AS "Total Beds Usage",
-            covid_beds_used AS "COVID Beds Usage",
-            (total_beds_used - covid_beds_used) AS "Non-COVID Beds Usage"
-        FROM BedUsage
-        ORDER BY "Week";
-        """
-        parameters = {'selected_week': selected_week}
-        df_rpt_4 = pd.read_sql_query(q_rpt_4, conn, params=parameters)
-
-        fig, ax = plt.subplots(figsize=(12, 5))
-        ax.plot(df_rpt_4['Week'], df_rpt_4['Total Beds Usage'],
-                label='Total Beds Used', color='blue')
-        ax.plot(df_rpt_4['Week'], df_rpt_4['COVID Beds Usage'],
-                label='COVID Beds Used', color='green')
-
-        plt.title('Hospital Beds Usage per Week')
-        plt.xlabel('Week')
-        plt.ylabel('Number of Beds Used')
-        plt.legend()
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-
-        st.write("## Total Hospital Beds Used Per Week: COVID vs Non-COVID")
-        st.pyplot(fig)
-
-    with tab5:
-        # Report 5: States with Largest Increase in COVID Cases
-        q_rpt_5 = """
-        WITH WeeklyCases AS (
-        SELECT
-            SUBSTRING(CAST(fips_code AS TEXT), 1, 2) AS state,
-            collection_week,
-            SUM(inpatient_beds_used_covid_7_day_avg) AS covid_beds
-        FROM HospitalLogistics
-        JOIN HospitalSpecificDetails
-        ON HospitalSpecificDetails.hospital_pk = HospitalLogistics.hospital_pk
-        WHERE collection_week IN (%(selected_week)s, %(previous_week)s)
-        GROUP BY state, fips_code, collection_week
-        ),
-        ChangeInCases AS (
-            SELECT
-                current.state,
-                current.covid_beds AS covid_beds_this_week,
-                COALESCE(previous.covid_beds, 0) AS covid_beds_last_week,
-                (current.covid_beds - COALESCE(previous.covid_beds, 0))
-                    AS increase_in_cases
-            FROM
-                (
-                SELECT *
-                FROM WeeklyCases
-                WHERE collection_week = %(selected_week)s) AS current
-            LEFT JOIN
-                (SELECT *
-                FROM WeeklyCases
-                WHERE collection_week = %(previous_week)s) AS previous
-            ON current.state = previous.state
-        )
-        SELECT
-            state AS "State",
-            covid_beds_this_week AS "COVID Cases This Week",
-            covid_beds_last_week AS "COVID Cases Last Week",
-            increase_in_cases AS "Increase In COVID Cases"
-        FROM ChangeInCases
-        WHERE state IS NOT NULL AND
-        covid_beds_this_week IS NOT NULL AND
-        covid_beds_last_week IS NOT NULL AND
-        increase_in_cases IS NOT NULL AND
-        covid_beds_last_week != 0
-        ORDER BY increase_in_cases DESC;
-        """
-        parameters = {'selected_week': selected_week,
-                      'previous_week': selected_week - timedelta(weeks=1)
-                      }
-
-        df_rpt_5 = pd.read_sql_query(q_rpt_5, conn, params=parameters)
-        df_rpt_5.index = df_rpt_5.index + 1
-
-        st.write("## 10 States with Largest Increase in COVID Cases")
-        st.dataframe(df_rpt_5.head(10), use_container_width=True)
-
-    with tab6:
-        # Report 6: Hospitals with Biggest Weekly Difference in COVID Cases
-        q_rpt_6 = """
-        WITH WeeklyCases AS (
-            SELECT
-                hospital_name,
-                city,
-                collection_week,
-                SUM(inpatient_beds_used_covid_7_day_avg) AS covid_beds
-            FROM HospitalLogistics
-            JOIN HospitalSpecificDetails
-            ON
-            HospitalSpecificDetails.hospital_pk = HospitalLogistics.hospital_pk
-            WHERE collection_week IN (%(selected_week)s, %(previous_week)s)
-            GROUP BY hospital_name, city, collection_week
-        ),
-        ChangeInCases AS (
-            SELECT
-                current.hospital_name,
-                current.city,
-                current.covid_beds AS covid_beds_this_week,
-                COALESCE(previous.covid_beds, 0) AS covid_beds_last_week,
-                ABS(current.covid_beds - COALESCE(previous.covid_beds, 0))
-                    AS cases_difference
-            FROM
-                (
-                SELECT *
-                FROM WeeklyCases
-                WHERE collection_week = %(selected_week)s) current
-            LEFT JOIN
-                (
-                SELECT *
-                FROM WeeklyCases
-                WHERE collection_week = %(previous_week)s) previous
-            ON current.hospital_name = previous.hospital_name
-            AND current.city = previous.city
-        )
-        SELECT
-            hospital_name AS "Hospital Name",
-            covid_beds_this_week AS "COVID Cases This Week",
-            covid_beds_last_week AS "COVID Cases Last Week",
-            cases_difference AS "Difference in Cases"
-        FROM ChangeInCases
-        WHERE covid_beds_this_week IS NOT NULL AND
-        covid_beds_last_week IS NOT NULL AND
-        cases_difference IS NOT NULL AND
-        covid_beds_last_week != 0
-        ORDER BY cases_difference DESC
-        LIMIT 10;
-        """
-        parameters = {'selected_week': selected_week,
-                      'previous_week': selected_week - timedelta(weeks=1)}
-
-        df_rpt_6 = pd.read_sql_query(q_rpt_6, conn, params=parameters)
-        df_rpt_6.index = df_rpt_6.index + 1
-
-        st.write("## 10 Hospitals with Biggest Weekly \
-                 Difference in COVID Cases")
-        st.dataframe(df_rpt_6.head(10), use_container_width=True)
-
-    with tab7:
-        # Report 7: Hospitals That Did Not Report Data
-        q_rpt_7 = """
-        WITH MostRecentReporting AS (
-        SELECT
-            hospital_name,
-            hl.hospital_pk,
-            MAX(collection_week) as most_recent_date
-        FROM HospitalLogistics AS hl
-        JOIN HospitalSpecificDetails AS hs
-        ON hl.hospital_pk = hs.hospital_pk
-        GROUP BY hospital_name, hl.hospital_pk
-        ),
-        NotReportedLastWeek AS (
-        SELECT
-            mr.hospital_name,
-            mr.most_recent_date
-        FROM MostRecentReporting mr
-        WHERE NOT EXISTS (
-            SELECT 1
-            FROM HospitalLogistics hl
-            WHERE hl.collection_week = %(previous_week)s
-            AND hl.hospital_pk = mr.hospital_pk
-        )
+    # Only the selected report is queried and rendered, so a page view
+    # costs one report rather than all seven. "All Reports" runs the seven
+    # queries concurrently on pooled connections.
+    report_name = st.radio(
+        "Choose a report:",
+        list(REPORTS) + [ALL_REPORTS],
+        horizontal=True
+    )
+    if report_name == ALL_REPORTS:
+        start_time = time.perf_counter()
+        results, timings = fetch_reports_concurrently(
+            data_version, selected_week,
+            [report_id for report_id, _ in REPORTS.values()]
         )
-        SELECT
-            hospital_name AS "Hospital Name",
-            most_recent_date AS "Last Reported Date"
-        FROM NotReportedLastWeek
-        WHERE hospital_name IS NOT NULL AND
-        most_recent_date IS NOT NULL
-        ORDER BY hospital_name
-        """
-        parameters = {'selected_week': selected_week,
-                      'previous_week': selected_week - timedelta(weeks=1)}
-
-        df_rpt_7 = pd.read_sql_query(q_rpt_7, conn, params=parameters)
-        df_rpt_7.index = df_rpt_7.index + 1
-
-        st.write("## Hospitals That Did Not Report Data For Selected Week")
-        st.dataframe(df_rpt_7, use_container_width=True)
-
-    # Close the database connection
-    conn.close()
+        page_seconds = time.perf_counter() - start_time
+        for report_id, render in REPORTS.values():
+            render(results[report_id])
+        render_query_timings(timings, page_seconds)
+    else:
+        report_id, render = REPORTS[report_name]
+        render(fetch_report(data_version, report_id, selected_week))
+
+    show_debug_stats()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+"""
+This module contains functions that run the reporting dashboard queries and
+return their results as DataFrames. They only need a database connection,
+so they can also be used outside of Streamlit.
+"""
+
+from datetime import timedelta
+import pandas as pd
+import queries
+
+# Report ids and the queries they run
+REPORT_QUERIES = {
+    'rpt_1': queries.RECORDS_LOADED_REPORT_QUERY,
+    'rpt_2': queries.BED_UTILIZATION_SUMMARY_REPORT_QUERY,
+    'rpt_3': queries.BED_USAGE_BY_QUALITY_RATING_REPORT_QUERY,
+    'rpt_4': queries.TOTAL_BEDS_USED_REPORT_QUERY,
+    'rpt_5': queries.STATE_COVID_CASES_REPORT_QUERY,
+    'rpt_6': queries.HOSPITAL_COVID_CASES_REPORT_QUERY,
+    'rpt_7': queries.NON_REPORTING_HOSPITALS_REPORT_QUERY,
+}
+
+
+def report_params(selected_week):
+    """
+    Build the query parameters shared by all reports.
+
+    Parameters:
+    - selected_week (datetime.date): The week selected in the dashboard.
+
+    Returns:
+    - dict: 'selected_week' and 'previous_week' (one week earlier).
+    """
+    return {'selected_week': selected_week,
+            'previous_week': selected_week - timedelta(weeks=1)}
+
+
+def available_weeks(conn):
+    """Return the collection weeks in HospitalLogistics, newest first."""
+    return pd.read_sql_query(queries.AVAILABLE_WEEKS_QUERY, conn)
+
+
+def run_report(conn, report_id, selected_week):
+    """
+    Run one dashboard report for a week.
+
+    Parameters:
+    - conn (psycopg.Connection): Database connection object.
+    - report_id (str): One of REPORT_QUERIES, e.g. 'rpt_1'.
+    - selected_week (datetime.date): The week to report on.
+
+    Returns:
+    - pd.DataFrame: The report result.
+    """
+    return pd.read_sql_query(REPORT_QUERIES[report_id], conn,
+                             params=report_params(selected_week))